@@ -44,6 +44,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestProfilerMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'SkillBridge.urls'
@@ -52,8 +54,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'], 
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compile each template once per process, not once per render.
+            # runserver's autoreloader empties it when a template is edited.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -69,13 +78,129 @@ WSGI_APPLICATION = 'SkillBridge.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite, tuned for many readers alongside a steady stream of writes (quiz
+# attempts, submissions): in WAL mode readers no longer wait for a writer,
+# and IMMEDIATE transactions take the write lock up front, so concurrent
+# writers queue for up to busy_timeout instead of failing with "database
+# is locked" halfway through.
+#
+# WAL mode is stored in the database file's header, so the first connection
+# to a file in another mode rewrites it. The committed dev db.sqlite3 is
+# already in WAL mode, so commands such as `check` leave it untouched; its
+# -wal and -shm side files are in .gitignore.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA mmap_size=268435456;'
+    'PRAGMA cache_size=-32000;'
+    'PRAGMA temp_store=MEMORY;'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica for views marked @replica_reads (core/db_router.py):
+# any copy of the primary, e.g. a file kept in sync by
+# `python manage.py sync_replica --every 5`.
+if os.environ.get('SKILLBRIDGE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['SKILLBRIDGE_REPLICA_DB'],
+        'OPTIONS': {'init_command': SQLITE_PRAGMAS + 'PRAGMA query_only=ON;'},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# How long a visitor's reads stay on the primary after they write.
+REPLICA_PIN_SECONDS = 10
+
+# Serve course_detail, lesson_detail and student_dashboard with their async
+# versions (core/views.py #20), whose queries run concurrently. Only worth
+# it under ASGI (SkillBridge/asgi.py, e.g. `uvicorn SkillBridge.asgi:application`);
+# under WSGI each async view gets an event loop of its own.
+ASYNC_READ_VIEWS = os.environ.get('SKILLBRIDGE_ASYNC_VIEWS') == '1'
+
+
+# Caches
+# 'default' is shared by every worker process on the host, so invalidating a
+# key from one process (signals in core/signals.py) is seen by all of them.
+# It holds a few keys per course and quiz (outline, analytics, page and quiz
+# version tokens); MAX_ENTRIES leaves room for some thousands of courses, as
+# an evicted version token silently empties the pages keyed on it.
+# 'memberships' holds one key per active user (core/enrollments.py), apart,
+# so that many users never push the per-course keys out; a cull there only
+# costs a re-read.
+# 'pages' holds whole anonymous pages in each process's memory; their keys
+# embed version tokens from 'default' (see core/page_cache.py). 'sessions'
+# is shared like 'default' but kept apart, in a directory of its own, so
+# that culling one of them never evicts the other's entries.
+#
+# FileBasedCache keeps one flat directory, lists it on every set() and,
+# once MAX_ENTRIES is reached, deletes a third of the entries at random. So
+# the file-based 'sessions' cache holds a few thousand live sessions at
+# most; past that, set SKILLBRIDGE_REDIS_URL (e.g. redis://127.0.0.1:6379/1,
+# needs the redis package) to keep sessions in Redis instead.
+_REDIS_URL = os.environ.get('SKILLBRIDGE_REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+    'memberships': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'membership_cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'skillbridge-pages',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': _REDIS_URL,
+    } if _REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'session_cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Sessions are read from the 'sessions' cache, so an authenticated request
+# no longer queries django_session (on SQLite, every session write also
+# queues behind the one writer lock). With write-through (the default) each
+# session write goes to the database as well, and a cache miss, after a
+# cull or a cleared cache, falls back to it ('cached_db'). SKILLBRIDGE_SESSION_DB=0
+# makes sessions cache-only, where such a miss logs the visitor out: only
+# sensible with Redis, which doesn't cull at random.
+SESSION_DB_WRITE_THROUGH = os.environ.get('SKILLBRIDGE_SESSION_DB', '1') == '1'
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + ('cached_db' if SESSION_DB_WRITE_THROUGH else 'cache')
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Flash messages ride in a cookie (ours are one-liners), never the session,
+# so messages.success() and friends cost no session write.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# How long a user's enrolled course ids stay cached (see core/enrollments.py).
+ENROLLMENT_CACHE_TIMEOUT = 60 * 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -119,6 +244,22 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are hashed while they stream in (see core/uploads.py); files over
+# MAX_UPLOAD_SIZE are dropped as soon as they cross it.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.HashingMemoryFileUploadHandler',
+    'core.uploads.HashingTemporaryFileUploadHandler',
+]
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+# Media is served by core.views.media (see core/media.py), which checks who
+# may see each file. Set to 'x-accel-redirect' (nginx) or 'x-sendfile'
+# (Apache, lighttpd) to have the web server send the bytes instead; nginx
+# needs an `internal` location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to
+# MEDIA_ROOT.
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 
 AUTH_USER_MODEL = 'core.User'
 
@@ -126,5 +267,23 @@ AUTH_USER_MODEL = 'core.User'
 LOGIN_URL = 'student_login'          
 LOGIN_REDIRECT_URL = 'course_list'  
 LOGOUT_REDIRECT_URL = 'home'         
+
+# Request profiler (see core/profiling.py). Tokens come from
+# `python manage.py profiler_token <staff username>`.
+PROFILER_ENABLED = True
+PROFILER_TOKEN_MAX_AGE = 60 * 60
+PROFILER_REPORT_DIR = BASE_DIR / 'profiles'
+
+# Time every request's templates, blocks and queries (cheaply: no SQL
+# stacks, no report file) and send the totals as a Server-Timing header,
+# which browsers show under Network > Timing and `manage.py benchmark` reads.
+TEMPLATE_TIMING = os.environ.get('SKILLBRIDGE_TEMPLATE_TIMING') == '1'
+
+# Rendered certificate PDFs, content-addressed (see core/certificates.py).
+CERTIFICATE_CACHE_DIR = BASE_DIR / 'certificate_cache'
+# Size of the process pool cohort certificates are rendered in (started on
+# first use and kept); None means one per CPU.
+CERTIFICATE_WORKERS = None
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
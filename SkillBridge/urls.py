@@ -1,9 +1,14 @@
 from django.contrib import admin
 from django.urls import path
 from django.conf import settings
-from django.conf.urls.static import static
 from core import views  
 
+
+def read_view(name):
+    # The async version of a read view when ASYNC_READ_VIEWS is on.
+    return getattr(views, f'{name}_async' if settings.ASYNC_READ_VIEWS else name)
+
+
 urlpatterns = [
     # --- 1. Admin Path ---
     path('admin/', admin.site.urls),
@@ -18,32 +23,43 @@ urlpatterns = [
     
     # --- 4. Core App Paths ---
     path('courses/', views.course_list, name='course_list'),
+    path('courses/more/', views.course_list_more, name='course_list_more'),
     path('profile/', views.student_profile, name='student_profile'),
-    path('dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('dashboard/', read_view('student_dashboard'), name='student_dashboard'),
+    path('dashboard/submissions/more/', views.dashboard_submissions_more, name='dashboard_submissions_more'),
+    path('dashboard/quiz-results/more/', views.dashboard_quiz_results_more, name='dashboard_quiz_results_more'),
 
     # --- 5. Course Interaction Paths ---
-    path('course/<int:course_id>/', views.course_detail, name='course_detail'),
+    path('course/<int:course_id>/', read_view('course_detail'), name='course_detail'),
     path('course/<int:course_id>/enroll/', views.enroll_course, name='enroll_course'),
     
     # Lessons
-    path('course/<int:course_id>/lesson/<int:lesson_id>/', views.lesson_detail, name='lesson_detail'),
+    path('course/<int:course_id>/lesson/<int:lesson_id>/', read_view('lesson_detail'), name='lesson_detail'),
     
     # Assignments
     path('course/<int:course_id>/assignment/<int:assignment_id>/', views.assignment_detail, name='assignment_detail'),
     path('course/<int:course_id>/assignment/<int:assignment_id>/submissions/', views.assignment_submissions, name='assignment_submissions'),
+    path('course/<int:course_id>/assignment/<int:assignment_id>/submissions/more/', views.assignment_submissions_more, name='assignment_submissions_more'),
     
     # Quiz
     path('course/<int:course_id>/quiz/<int:quiz_id>/', views.take_quiz, name='take_quiz'),
+    path('course/<int:course_id>/quiz/<int:quiz_id>/leaderboard.json', views.quiz_leaderboard, name='quiz_leaderboard'),
+    path('course/<int:course_id>/quiz/<int:quiz_id>/leaderboard/me.json', views.quiz_leaderboard_me, name='quiz_leaderboard_me'),
     
     # Certificate
     path('course/<int:course_id>/certificate/', views.generate_certificate, name='generate_certificate'),
+    path('course/<int:course_id>/certificates/', views.course_certificates, name='course_certificates'),
+    path('course/<int:course_id>/gradebook.csv', views.course_gradebook, name='course_gradebook'),
+    path('course/<int:course_id>/analytics/', views.course_analytics, name='course_analytics'),
+    path('course/<int:course_id>/analytics.json', views.course_analytics_api, name='course_analytics_api'),
+    path('course/<int:course_id>/leaderboard.json', views.course_leaderboard, name='course_leaderboard'),
+    path('course/<int:course_id>/leaderboard/me.json', views.course_leaderboard_me, name='course_leaderboard_me'),
 
     # --- 6. Footer Pages ---
     path('about/', views.about, name='about'),
     path('terms/', views.terms, name='terms'),
     path('privacy/', views.privacy, name='privacy'),
-]
-
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # --- 7. Media (uploads, served with access checks in every environment) ---
+    path('media/<path:name>', views.serve_media, name='media'),
+]
\ No newline at end of file
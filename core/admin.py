@@ -1,5 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import ValidationError
+from django.template.response import TemplateResponse
+from . import enrollments
+from .forms import EnrollmentImportForm
 from .models import User, Course, Enrollment, Assignment, Submission, Lesson, Quiz, Question, Choice, QuizResult
 
 
@@ -22,6 +27,36 @@ admin.site.register(User, CustomUserAdmin)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'mentor', 'created_at')
     search_fields = ('title',)
+    actions = ['import_enrollments']
+
+    @admin.action(description="Import enrollments into selected courses")
+    def import_enrollments(self, request, queryset):
+        form = EnrollmentImportForm(request.POST or None, request.FILES or None)
+        if 'apply' in request.POST and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = enrollments.bulk_enroll(
+                    enrollments.read_rows(upload, enrollments.guess_format(upload.name)),
+                    courses=list(queryset),
+                )
+            except ValidationError as e:
+                self.message_user(request, e.message, messages.ERROR)
+                return None
+            self.message_user(request, f"Import finished: {result}.", messages.SUCCESS)
+            if result.unknown_students:
+                self.message_user(
+                    request, f"Unknown students: {', '.join(sorted(result.unknown_students))}", messages.WARNING,
+                )
+            return None
+
+        return TemplateResponse(request, 'admin/core/course/import_enrollments.html', {
+            **self.admin_site.each_context(request),
+            'title': "Import enrollments",
+            'opts': self.model._meta,
+            'form': form,
+            'courses': queryset,
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        })
 
 # 3. Lesson Admin
 @admin.register(Lesson)
@@ -0,0 +1,178 @@
+import numpy as np
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+
+from . import grading
+from .models import Assignment, Enrollment, Quiz, QuizResult, Submission
+
+
+PERCENTILES = (25, 50, 75, 90)
+HISTOGRAM_BINS = 10
+
+
+def _cache_key(course_id):
+    return f'course:{course_id}:analytics'
+
+
+def invalidate(*course_ids):
+    cache.delete_many([_cache_key(course_id) for course_id in course_ids])
+
+
+def get(course_id):
+    """Analytics of a course, cached until one of its grades changes."""
+    stats = cache.get(_cache_key(course_id))
+    if stats is None:
+        stats = compute(course_id)
+        cache.set(_cache_key(course_id), stats, timeout=None)
+    return stats
+
+
+def _column(rows, index, dtype):
+    # None (ungraded, not submitted, ...) becomes NaN in float columns.
+    if dtype is float:
+        return np.fromiter((np.nan if row[index] is None else row[index] for row in rows), float, len(rows))
+    return np.fromiter((row[index] for row in rows), dtype, len(rows))
+
+
+def _round(value):
+    return None if value is None or np.isnan(value) else round(float(value), 2)
+
+
+def summarize(values, bins=HISTOGRAM_BINS, value_range=None):
+    """Count, mean, spread, percentiles and a histogram of the non-NaN values.
+
+    The histogram spans `value_range` (default 0..MAX_MARKS), widened to
+    the data if any value falls outside it: np.histogram drops those.
+    """
+    low, high = value_range or (0, grading.MAX_MARKS)
+    values = values[~np.isnan(values)]
+    if values.size:
+        low, high = min(low, values.min()), max(high, values.max())
+    counts, edges = np.histogram(values, bins=bins, range=(low, high))
+    summary = {
+        'count': int(values.size),
+        'histogram': {'edges': [_round(e) for e in edges], 'counts': counts.tolist()},
+    }
+    if not values.size:
+        return {**summary, 'mean': None, 'std': None, 'min': None, 'max': None,
+                'percentiles': {str(p): None for p in PERCENTILES}}
+    return {
+        **summary,
+        'mean': _round(values.mean()),
+        'std': _round(values.std()),
+        'min': _round(values.min()),
+        'max': _round(values.max()),
+        'percentiles': {str(p): _round(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+    }
+
+
+def histogram_bars(summary):
+    """The histogram of summarize() as [{'label', 'count', 'height'}], height
+    in percent of the tallest bar, for templates."""
+    edges, counts = summary['histogram']['edges'], summary['histogram']['counts']
+    tallest = max(counts, default=0) or 1
+    return [
+        {'label': f"{edges[i]:g}–{edges[i + 1]:g}", 'count': count, 'height': round(count * 100 / tallest)}
+        for i, count in enumerate(counts)
+    ]
+
+
+def _rate(part, whole):
+    part = np.asarray(part, dtype=float)
+    return np.divide(part, whole, out=np.zeros(part.size), where=np.asarray(whole) > 0)
+
+
+def compute(course_id):
+    """Build the analytics of a course from one query per table.
+
+    Each table comes back as column arrays; per-assignment and per-quiz
+    figures are grouped with np.bincount over the row's position in the
+    (sorted) id array rather than looped over in Python.
+    """
+    # The result is cached until a grade changes: read the primary, not a
+    # replica that may not have that grade yet.
+    enrolled = Enrollment.objects.using(DEFAULT_DB_ALIAS).filter(course_id=course_id).count()
+
+    assignments = list(
+        Assignment.objects.using(DEFAULT_DB_ALIAS).filter(course_id=course_id)
+        .order_by('id').values_list('id', 'title', 'due_date')
+    )
+    assignment_ids = _column(assignments, 0, np.int64)
+    due = np.array([row[2].timestamp() for row in assignments], dtype=float)
+
+    # Each query is its own snapshot; asking for the rows of the assignments
+    # (and quizzes) just read keeps one created in between out of the arrays.
+    submissions = list(
+        Submission.objects.using(DEFAULT_DB_ALIAS).filter(assignment_id__in=assignment_ids.tolist())
+        .values_list('assignment_id', 'marks', 'submitted_at')
+    )
+    sub_index = np.searchsorted(assignment_ids, _column(submissions, 0, np.int64))
+    marks = _column(submissions, 1, float)
+    submitted_at = np.fromiter((row[2].timestamp() for row in submissions), float, len(submissions))
+    graded = ~np.isnan(marks)
+
+    n = len(assignments)
+    submitted = np.bincount(sub_index, minlength=n)
+    late = np.bincount(sub_index, weights=submitted_at > due[sub_index], minlength=n)
+    graded_count = np.bincount(sub_index, weights=graded, minlength=n)
+    marks_sum = np.bincount(sub_index[graded], weights=marks[graded], minlength=n)
+
+    quizzes = list(
+        Quiz.objects.using(DEFAULT_DB_ALIAS).filter(course_id=course_id)
+        .annotate(question_count=Count('questions')).order_by('id')
+        .values_list('id', 'title', 'total_marks', 'question_count')
+    )
+    quiz_ids = _column(quizzes, 0, np.int64)
+    # A score is the number of questions answered right (quizzes.grade()).
+    question_counts = _column(quizzes, 3, float)
+
+    results = list(
+        QuizResult.objects.using(DEFAULT_DB_ALIAS).filter(quiz_id__in=quiz_ids.tolist()).values_list('quiz_id', 'score')
+    )
+    res_index = np.searchsorted(quiz_ids, _column(results, 0, np.int64))
+    scores = _column(results, 1, float)
+    # Quizzes have different lengths; compare them as percentages. Clipped,
+    # as questions deleted since an attempt would push it past 100.
+    percents = np.clip(np.divide(
+        scores * 100, question_counts[res_index],
+        out=np.full(len(results), np.nan), where=question_counts[res_index] > 0,
+    ), 0, 100)
+
+    m = len(quizzes)
+    attempts = np.bincount(res_index, minlength=m)
+    score_sum = np.bincount(res_index, weights=scores, minlength=m)
+
+    assignment_completion = _rate(submitted, enrolled)
+    late_rate = _rate(late, submitted)
+    quiz_completion = _rate(attempts, enrolled)
+
+    return {
+        'enrolled': enrolled,
+        'marks': summarize(marks),
+        'quiz_percent': summarize(percents),
+        'assignments': [
+            {
+                'id': assignment_id,
+                'title': title,
+                'submitted': int(submitted[i]),
+                'completion_rate': _round(assignment_completion[i]),
+                'late_rate': _round(late_rate[i]),
+                'graded': int(graded_count[i]),
+                'mean_marks': _round(marks_sum[i] / graded_count[i]) if graded_count[i] else None,
+            }
+            for i, (assignment_id, title, _) in enumerate(assignments)
+        ],
+        'quizzes': [
+            {
+                'id': quiz_id,
+                'title': title,
+                'total_marks': total_marks,
+                'questions': questions,
+                'attempts': int(attempts[i]),
+                'completion_rate': _round(quiz_completion[i]),
+                'mean_score': _round(score_sum[i] / attempts[i]) if attempts[i] else None,
+            }
+            for i, (quiz_id, title, total_marks, questions) in enumerate(quizzes)
+        ],
+    }
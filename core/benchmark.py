@@ -0,0 +1,230 @@
+import logging
+import platform
+import threading
+import time
+
+import django
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.test import Client
+from django.urls import URLPattern, get_resolver, reverse
+
+from .models import Assignment, Course, Enrollment, Lesson, Quiz, QuizResult, Submission, User
+
+
+# Drives every page in SkillBridge/urls.py through the test client and
+# measures it: `python manage.py benchmark`. Against the same data set (e.g.
+# `seed_data --seed 0` with the same volumes) the fixtures picked below, and
+# so the pages requested, are the same on every run, which makes two result
+# files comparable.
+
+# Pages a mentor sees; catalog and account pages are requested signed out,
+# everything else as an enrolled student.
+MENTOR_PAGES = {
+    'assignment_submissions', 'assignment_submissions_more', 'course_certificates', 'course_gradebook',
+    'course_analytics', 'course_analytics_api',
+}
+ANONYMOUS_PAGES = {
+    'home', 'course_list', 'course_list_more', 'student_login', 'student_register', 'about', 'terms', 'privacy',
+}
+# Logging out would sign the client out mid-run, and enrolling writes.
+SKIPPED = {'student_logout', 'enroll_course'}
+
+
+class QueryCounter:
+    """Counts the queries of every database connection, in any thread.
+    Async views run theirs on worker threads (core/concurrency.py), where
+    CaptureQueriesContext doesn't see them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.count += 1
+                self.seconds += time.perf_counter() - started
+
+    def _attach(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        # Connections are per thread: wrap this thread's, and any opened later.
+        for connection in connections.all():
+            self._attach(connection=connection)
+        connection_created.connect(self._attach)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self._attach)
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+def fixtures():
+    """The objects the URL parameters are filled from: the most popular
+    course that has lessons, assignments and quizzes, its mentor, and one
+    of its students. Ties go to the lowest id, so a data set always gives
+    the same answer."""
+    popular = Enrollment.objects.values('course').annotate(students=Count('id')).order_by('-students', 'course')
+    for row in popular.iterator():
+        course = Course.objects.select_related('mentor').get(pk=row['course'])
+        lesson = Lesson.objects.filter(course=course).order_by('order', 'id').first()
+        assignment = Assignment.objects.filter(course=course).order_by('due_date', 'id').first()
+        quiz = Quiz.objects.filter(course=course).order_by('id').first()
+        if lesson and assignment and quiz:
+            break
+    else:
+        return None
+    # Preferably one who took the quiz, so their quiz leaderboard entry exists.
+    taken = QuizResult.objects.filter(quiz=quiz).order_by('student').values('student')[:1]
+    enrolled = Enrollment.objects.filter(course=course).order_by('student').values('student')[:1]
+    student = User.objects.filter(pk=taken).first() or User.objects.get(pk=enrolled)
+    image = course.course_image or next(
+        (c.course_image for c in Course.objects.exclude(course_image='').order_by('id')[:1]), None,
+    )
+    return {
+        'student': student, 'mentor': course.mentor,
+        'course_id': course.id, 'lesson_id': lesson.id, 'assignment_id': assignment.id, 'quiz_id': quiz.id,
+        'name': image.name if image else None,
+    }
+
+
+def pages(data):
+    """(url name, path, role) for every page in the URLconf, admin aside."""
+    resolver = get_resolver()
+    found = []
+    for pattern in resolver.url_patterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIPPED:
+            continue
+        kwargs = {name: data[name] for name in pattern.pattern.converters}
+        if None in kwargs.values():
+            continue  # e.g. no course has an image to serve
+        role = ('mentor' if pattern.name in MENTOR_PAGES
+                else 'anonymous' if pattern.name in ANONYMOUS_PAGES else 'student')
+        found.append((pattern.name, reverse(pattern.name, kwargs=kwargs), role))
+    return found
+
+
+def _consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def _template_ms(response):
+    # Sent when TEMPLATE_TIMING is on (see core/middleware.py).
+    for metric in response.get('Server-Timing', '').split(','):
+        name, _, params = metric.strip().partition(';')
+        if name == 'tpl':
+            return float(params.partition('dur=')[2].partition(';')[0])
+    return None
+
+
+def measure(client, path, requests, warmup, counter):
+    for _ in range(warmup):
+        _consume(client.get(path))
+    timings, queries, db_time, template_time = [], [], [], []
+    for _ in range(requests):
+        counter.reset()
+        started = time.perf_counter()
+        response = client.get(path)
+        size = _consume(response)
+        timings.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        db_time.append(counter.seconds * 1000)
+        template_time.append(_template_ms(response))
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        'status': response.status_code,
+        'latency_ms': {
+            'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3),
+            'mean': round(float(np.mean(timings)), 3), 'max': round(max(timings), 3),
+        },
+        'db_ms_p50': round(float(np.median(db_time)), 3),
+        'template_ms_p50': round(float(np.median(template_time)), 3) if None not in template_time else None,
+        'queries': {'median': int(np.median(queries)), 'max': max(queries)},
+        'bytes': size,
+    }
+
+
+def run(requests=50, warmup=5, only=None, log=lambda message: None):
+    """Benchmark every page; returns the report (a JSON-ready dict)."""
+    data = fixtures()
+    if data is None:
+        raise ValueError("No course with lessons, assignments, quizzes and students; run seed_data first.")
+    clients = {'anonymous': Client(raise_request_exception=False)}
+    for role in ('student', 'mentor'):
+        clients[role] = Client(raise_request_exception=False)
+        clients[role].force_login(data[role])
+
+    results = []
+    # Expected 403s and redirects would otherwise log a warning per request.
+    request_log = logging.getLogger('django.request')
+    level = request_log.level
+    request_log.setLevel(logging.ERROR)
+    try:
+        with QueryCounter() as counter:
+            for name, path, role in pages(data):
+                if only and name not in only:
+                    continue
+                result = {'name': name, 'path': path, 'role': role}
+                results.append(result)
+                try:
+                    result.update(measure(clients[role], path, requests, warmup, counter))
+                except Exception as e:
+                    # A streamed body fails while it is read, past the client's
+                    # exception handling; note it and carry on with the rest.
+                    result['error'] = f'{type(e).__name__}: {e}'
+                    log(f"{name:32} failed: {result['error']}")
+                    continue
+                log(f"{name:32} {result['status']} p50 {result['latency_ms']['p50']:8.2f}ms "
+                    f"p95 {result['latency_ms']['p95']:8.2f}ms  {result['queries']['median']:3} queries"
+                    + (f"  templates {result['template_ms_p50']:.2f}ms" if result['template_ms_p50'] is not None else ''))
+    finally:
+        request_log.setLevel(level)
+
+    return {
+        'meta': {
+            'requests': requests, 'warmup': warmup,
+            'python': platform.python_version(), 'django': django.get_version(),
+            'database': connections['default'].vendor, 'debug': settings.DEBUG,
+            'async_read_views': settings.ASYNC_READ_VIEWS, 'template_timing': settings.TEMPLATE_TIMING,
+            'rows': {model._meta.model_name: model.objects.count()
+                     for model in (User, Course, Enrollment, Submission, QuizResult)},
+            'fixtures': {key: value for key, value in data.items() if key.endswith('_id')},
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, report):
+    """Rows of (name, role, p50 ratio, p95 ratio, change in queries), for
+    pages present in both reports; a ratio below 1 is faster."""
+    before = {(r['name'], r['role']): r for r in baseline['results']}
+    rows = []
+    for result in report['results']:
+        old = before.get((result['name'], result['role']))
+        if old is None or 'error' in old or 'error' in result:
+            continue
+        rows.append((
+            result['name'], result['role'],
+            result['latency_ms']['p50'] / old['latency_ms']['p50'],
+            result['latency_ms']['p95'] / old['latency_ms']['p95'],
+            result['queries']['median'] - old['queries']['median'],
+        ))
+    return rows
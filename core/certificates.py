@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import multiprocessing
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import django
+from django.conf import settings
+from django.db.models import Max
+from django.template.loader import get_template
+
+from . import profiling, progress
+from .models import Enrollment, QuizResult, Submission
+
+
+TEMPLATE_NAME = 'certificate_template.html'
+
+
+@lru_cache(maxsize=None)
+def template_version():
+    """Digest of the certificate template, so editing it invalidates the cache."""
+    source = get_template(TEMPLATE_NAME).template.source
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def completion_date(enrollment):
+    # The day the last requirement was met, not the day of the download, so
+    # the certificate (and its cache key) stays the same every time.
+    student_id, course_id = enrollment.student_id, enrollment.course_id
+    dates = [
+        Submission.objects.filter(student_id=student_id, assignment__course_id=course_id)
+        .aggregate(last=Max('submitted_at'))['last'],
+        QuizResult.objects.filter(student_id=student_id, quiz__course_id=course_id)
+        .aggregate(last=Max('attempted_at'))['last'],
+    ]
+    return max((d for d in dates if d), default=enrollment.enrolled_at).date()
+
+
+def build_context(student, course, completed_on):
+    return {
+        'student_name': f"{student.first_name} {student.last_name}",
+        'course_title': course.title,
+        'mentor_name': f"{course.mentor.first_name} {course.mentor.last_name}",
+        'completion_date': completed_on,
+    }
+
+
+def cache_key(context):
+    payload = json.dumps({**context, 'template': template_version()}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_path(key):
+    # Shard by the first two hex digits so no directory grows unbounded.
+    return os.path.join(settings.CERTIFICATE_CACHE_DIR, key[:2], f"{key}.pdf")
+
+
+def render_pdf(context):
+    html_content = get_template(TEMPLATE_NAME).render(context)
+    # WeasyPrint is imported here so its (slow) first import shows up in the
+    # profile of the request that pays for it instead of at startup.
+    with profiling.span('weasyprint.import'):
+        from weasyprint import HTML
+    with profiling.span('weasyprint.render'):
+        return HTML(string=html_content).write_pdf()
+
+
+def get_or_render(context):
+    """Return (key, path) of the cached PDF for `context`, rendering it on a miss."""
+    key = cache_key(context)
+    path = cache_path(key)
+    if not os.path.exists(path):
+        pdf = render_pdf(context)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so concurrent readers never see a
+        # half-written PDF.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(pdf)
+        os.replace(tmp, path)
+    return key, path
+
+
+# --- Cohort issuance ---
+
+def eligible_enrollments(course):
+    """Enrollments of `course` that pass the same checks as generate_certificate."""
+    enrollments = Enrollment.objects.filter(course=course)
+    progress.rebuild(enrollments.filter(progress__isnull=True))
+    return enrollments.filter(progress__certificate_eligible=True).select_related('student').order_by('pk')
+
+
+def completion_dates(course, enrollments):
+    """completion_date() for many enrollments of one course, in two queries."""
+    last = {}
+    for model, field, path in (
+        (Submission, 'submitted_at', 'assignment__course'),
+        (QuizResult, 'attempted_at', 'quiz__course'),
+    ):
+        rows = model.objects.filter(**{path: course}).values('student_id').annotate(last=Max(field))
+        for row in rows:
+            last[row['student_id']] = max(row['last'], last.get(row['student_id'], row['last']))
+    return {
+        e.pk: last.get(e.student_id, e.enrolled_at).date()
+        for e in enrollments
+    }
+
+
+def certificate_filename(course, student):
+    return f"certificate_{course.title}_{student.username}.pdf"
+
+
+def cohort_jobs(course):
+    """(filename, context) for every student of `course` who has earned a certificate."""
+    enrollments = list(eligible_enrollments(course))
+    dates = completion_dates(course, enrollments)
+    return [
+        (certificate_filename(course, e.student), build_context(e.student, course, dates[e.pk]))
+        for e in enrollments
+    ]
+
+
+def _render_job(job):
+    filename, context = job
+    key, path = get_or_render(context)
+    return filename, path
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor(workers=None):
+    """The process pool misses are rendered in: started on first use and kept
+    for the life of the process, so no request pays for starting workers.
+    `workers` only sizes it the first time."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = workers or getattr(settings, 'CERTIFICATE_WORKERS', None) or os.cpu_count()
+            # Spawned, not forked: a child inherits none of the server's
+            # threads or database connections, and sets Django up itself.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+            )
+        return _pool
+
+
+def _discard(pool):
+    # A worker died (killed, out of memory): the pool won't take more work,
+    # so let the next call start a fresh one.
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_many(jobs, workers=None):
+    """Yield (filename, path) for every job, rendering cache misses in parallel.
+
+    Cached PDFs are yielded straight away; only misses go to the process
+    pool, and they are yielded in completion order.
+    """
+    misses = []
+    for filename, context in jobs:
+        path = cache_path(cache_key(context))
+        if os.path.exists(path):
+            yield filename, path
+        else:
+            misses.append((filename, context))
+    if not misses:
+        return
+
+    pool = _executor(workers)
+    futures = []
+    try:
+        futures = [pool.submit(_render_job, job) for job in misses]
+        for future in as_completed(futures):
+            yield future.result()
+    except BrokenProcessPool:
+        _discard(pool)
+        raise
+    finally:
+        # The download was abandoned or failed: drop what hasn't started.
+        for future in futures:
+            future.cancel()
+
+
+class _ZipBuffer:
+    # Minimal unseekable file object: zipfile writes into it, we drain it.
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files, chunk_size=64 * 1024):
+    """Yield a ZIP archive of (arcname, path) pairs piece by piece.
+
+    PDFs are already compressed, so entries are stored, not deflated.
+    """
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, path in files:
+            with open(path, 'rb') as src, archive.open(arcname, 'w', force_zip64=True) as dest:
+                while True:
+                    data = src.read(chunk_size)
+                    if not data:
+                        break
+                    dest.write(data)
+                    yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,26 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+# Django's async ORM methods (aget, acount, ...) all run on one shared
+# thread, one query after another. gather() instead runs each callable in a
+# worker thread of its own, with its own database connection, so the
+# independent queries of a page overlap; in WAL mode SQLite serves the
+# concurrent readers in parallel.
+
+def _in_worker(call):
+    # Worker threads outlive the request, so their connections aren't
+    # cleaned up by request_finished; apply CONN_MAX_AGE here instead.
+    close_old_connections()
+    try:
+        return call()
+    finally:
+        close_old_connections()
+
+
+async def gather(*calls):
+    """Run the zero-argument sync callables concurrently; returns their
+    results in order. The first exception raised is re-raised."""
+    return await asyncio.gather(*(sync_to_async(_in_worker, thread_sensitive=False)(call) for call in calls))
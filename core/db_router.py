@@ -0,0 +1,121 @@
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Read/write split. Views wrapped in @replica_reads read from the 'replica'
+# database (see DATABASES in settings); everything else, every write, and
+# every read made inside a transaction (reads that feed a write, such as
+# progress.rebuild()) goes to the primary. So do reads whose results are
+# cached for everyone (outline, membership, analytics, anonymous pages):
+# cached from a lagging replica, they would outlive the lag. Without a
+# 'replica' alias configured this is all a no-op.
+REPLICA = 'replica'
+PIN_COOKIE = 'pin_primary'
+
+_use_replica = ContextVar('use_replica', default=False)
+_writes = ContextVar('db_writes', default=None)
+
+
+class WriteLog:
+    """Whether a request has written anything; see track_writes()."""
+    wrote = False
+
+
+def track_writes():
+    """Start recording the writes of the current request; returns the log
+    that db_for_write() marks. A mutable object, so that writes made in
+    threads started by sync_to_async() (which copy the context) count too."""
+    log = WriteLog()
+    _writes.set(log)
+    return log
+
+
+def read_from_primary(request):
+    """Keep the @replica_reads reads of `request` on the primary, e.g.
+    because what it renders is about to be cached for everyone."""
+    request._primary_reads = True
+
+
+def _enabled(request):
+    return (
+        REPLICA in settings.DATABASES
+        and PIN_COOKIE not in request.COOKIES
+        and not getattr(request, '_primary_reads', False)
+    )
+
+
+def _iterate_on_replica(iterable):
+    # A streamed body is produced after the view has returned (and its flag
+    # has been reset); set it again around each chunk, so that the rows come
+    # from the same database as the rest of the view's reads.
+    iterator = iter(iterable)
+    while True:
+        token = _use_replica.set(True)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _use_replica.reset(token)
+        yield chunk
+
+
+def _on_replica(response):
+    if response.streaming and not response.is_async:
+        response.streaming_content = _iterate_on_replica(response.streaming_content)
+    return response
+
+
+def replica_reads(view):
+    """Let `view` read from the replica, unless the visitor wrote something
+    moments ago (and would otherwise not see it yet)."""
+    if iscoroutinefunction(view):
+        # Threads started by sync_to_async() copy the context, flag included.
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not _enabled(request):
+                return await view(request, *args, **kwargs)
+            token = _use_replica.set(True)
+            try:
+                return _on_replica(await view(request, *args, **kwargs))
+            finally:
+                _use_replica.reset(token)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _enabled(request):
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            return _on_replica(view(request, *args, **kwargs))
+        finally:
+            _use_replica.reset(token)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write in the same request must see it, and so must
+        # the visitor's next requests (core/middleware.py pins them).
+        _use_replica.set(False)
+        log = _writes.get()
+        if log is not None:
+            log.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, schema included.
+        return db == DEFAULT_DB_ALIAS
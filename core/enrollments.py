@@ -0,0 +1,196 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from . import analytics, progress
+from .models import Course, Enrollment, User
+
+
+# --- Membership ---
+#
+# The ids of the courses a user is enrolled in, loaded with one query and
+# kept twice: on the request (for the rest of that request) and in the
+# shared 'memberships' cache for ENROLLMENT_CACHE_TIMEOUT seconds. core/signals.py drops
+# the cached copy whenever one of the user's enrollments changes.
+
+def _membership_key(user_id):
+    return f'user:{user_id}:enrollments'
+
+
+def enrolled_course_ids(request):
+    """frozenset of the ids of the courses request.user is enrolled in."""
+    if not request.user.is_authenticated:
+        return frozenset()
+    if not hasattr(request, '_enrolled_course_ids'):
+        key = _membership_key(request.user.pk)
+        ids = caches['memberships'].get(key)
+        if ids is None:
+            # Shared by the user's next requests: read it from the primary,
+            # or an enrollment made a moment ago could be cached as missing.
+            ids = tuple(sorted(
+                Enrollment.objects.using(DEFAULT_DB_ALIAS).filter(student_id=request.user.pk)
+                .values_list('course_id', flat=True)
+            ))
+            caches['memberships'].set(key, ids, settings.ENROLLMENT_CACHE_TIMEOUT)
+        request._enrolled_course_ids = frozenset(ids)
+    return request._enrolled_course_ids
+
+
+def is_enrolled(request, course_id):
+    return course_id in enrolled_course_ids(request)
+
+
+def forget_membership(*user_ids):
+    caches['memberships'].delete_many([_membership_key(user_id) for user_id in user_ids])
+
+
+# --- Bulk import ---
+#
+# A file is a list of rows naming a student by username and, optionally, a
+# course by id:
+#
+#     CSV:  student,course            JSON: [{"student": "alice", "course": 3},
+#           alice,3                          "bob"]
+#           bob,
+#
+# Rows without a course enroll the student in each of the `courses` passed
+# to bulk_enroll() (the command's --course, or the courses selected in the
+# admin).
+
+FORMATS = ('csv', 'json')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.unknown_students = set()
+        self.unknown_courses = set()
+
+    @property
+    def total(self):
+        return self.created + self.skipped
+
+    def __str__(self):
+        summary = f"{self.created} enrolled, {self.skipped} skipped (already enrolled or duplicate)"
+        if self.unknown_students:
+            summary += f", {len(self.unknown_students)} unknown students"
+        if self.unknown_courses:
+            summary += f", {len(self.unknown_courses)} unknown courses"
+        return summary
+
+
+def guess_format(filename):
+    ext = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    return ext if ext in FORMATS else 'csv'
+
+
+def read_rows(fh, fmt='csv'):
+    """Yield (username, course id or None) from a CSV or JSON file object."""
+    if isinstance(fh.read(0), bytes):
+        fh = io.TextIOWrapper(fh, encoding='utf-8-sig')
+
+    if fmt == 'json':
+        try:
+            records = json.load(fh)
+        except ValueError as e:
+            raise ValidationError(f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise ValidationError("Expected a JSON list of enrollments.")
+    elif fmt == 'csv':
+        records = csv.DictReader(fh)
+        if 'student' not in (records.fieldnames or []):
+            raise ValidationError("The CSV file needs a 'student' column.")
+    else:
+        raise ValidationError(f"Unsupported format {fmt!r}.")
+
+    for line, record in enumerate(records, start=1):
+        if isinstance(record, str):
+            record = {'student': record}
+        if not isinstance(record, dict) or not record.get('student'):
+            raise ValidationError(f"Row {line}: missing student.")
+        course = record.get('course')
+        if course in (None, ''):
+            course = None
+        else:
+            try:
+                course = int(course)
+            except (TypeError, ValueError):
+                raise ValidationError(f"Row {line}: invalid course id {course!r}.")
+        yield record['student'].strip(), course
+
+
+def bulk_enroll(rows, courses=(), batch_size=1000):
+    """Enroll many students at once and return an ImportResult.
+
+    Rows are handled `batch_size` at a time: two lookups to resolve students
+    and courses, then one INSERT that lets the (student, course) unique
+    constraint drop existing enrollments instead of checking each first.
+
+    Each batch commits on its own, so every row is read and checked before
+    the first one: a bad row raises ValidationError with nothing enrolled.
+    """
+    default_course_ids = [course.pk if isinstance(course, Course) else course for course in courses]
+    rows = list(rows)
+    if not default_course_ids:
+        missing = [username for username, course_id in rows if course_id is None]
+        if missing:
+            raise ValidationError(
+                f"No course given for {', '.join(map(repr, missing[:5]))}"
+                + (f" and {len(missing) - 5} more" if len(missing) > 5 else '') + "."
+            )
+    known_courses = set()
+    result = ImportResult()
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        _enroll_batch(batch, default_course_ids, known_courses, result)
+    return result
+
+
+def _enroll_batch(batch, default_course_ids, known_courses, result):
+    usernames = {username for username, _ in batch}
+    students = dict(
+        User.objects.filter(role='student', username__in=usernames).values_list('username', 'id')
+    )
+    result.unknown_students |= usernames - students.keys()
+
+    wanted = {course_id for _, course_id in batch if course_id is not None} | set(default_course_ids)
+    unchecked = wanted - known_courses
+    if unchecked:
+        known_courses |= set(Course.objects.filter(pk__in=unchecked).values_list('pk', flat=True))
+    result.unknown_courses |= wanted - known_courses
+
+    pairs = []
+    for username, course_id in batch:
+        if username not in students:
+            continue
+        for course_id in [course_id] if course_id is not None else default_course_ids:
+            if course_id in known_courses:
+                pairs.append((students[username], course_id))
+    if not pairs:
+        return
+
+    student_ids = {student_id for student_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    batch_enrollments = Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+    with transaction.atomic():
+        before = batch_enrollments.count()
+        Enrollment.objects.bulk_create(
+            [Enrollment(student_id=student_id, course_id=course_id) for student_id, course_id in set(pairs)],
+            ignore_conflicts=True,
+        )
+        created = batch_enrollments.count() - before
+        # bulk_create() sends no post_save, so build the new progress rows here...
+        progress.rebuild(batch_enrollments.filter(progress__isnull=True))
+    # Nor post_save's cache invalidation.
+    forget_membership(*student_ids)
+    analytics.invalidate(*course_ids)
+    result.created += created
+    result.skipped += len(pairs) - created
@@ -1,4 +1,7 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
 from django.contrib.auth.forms import UserCreationForm
 
 from .models import User, Submission 
@@ -48,4 +51,17 @@ class AssignmentSubmissionForm(forms.ModelForm):
                 'class': 'form-control', 
                 'accept': '.pdf,.doc,.docx,.zip' 
             }),
-        }
\ No newline at end of file
+        }
+
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        # With no new upload this is the stored file, already checked when it came in.
+        if isinstance(file, UploadedFile) and file.size > settings.MAX_UPLOAD_SIZE:
+            raise forms.ValidationError(
+                f"{file.name} is larger than the {filesizeformat(settings.MAX_UPLOAD_SIZE)} upload limit."
+            )
+        return file
+
+
+class EnrollmentImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a 'student' column (and optionally 'course'), or a JSON list.")
@@ -0,0 +1,85 @@
+import csv
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import Assignment, Enrollment, Quiz, QuizResult, Submission
+
+
+CHUNK_SIZE = 500
+
+
+class _Echo:
+    # csv.writer needs a file; this one hands back what it is given.
+    def write(self, value):
+        return value
+
+
+def header(assignments, quizzes):
+    row = ['Username', 'First name', 'Last name', 'Student ID']
+    for assignment in assignments:
+        row += [f"{assignment.title} (marks)", f"{assignment.title} (submitted at)"]
+    row += [f"{quiz.title} (score)" for quiz in quizzes]
+    row.append('Total marks')
+    return row
+
+
+def _submitted_at(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def _blank(value):
+    return '' if value is None else value
+
+
+def rows(course, chunk_size=CHUNK_SIZE):
+    """Yield the gradebook of `course` as lists: a header, then one row per
+    enrolled student.
+
+    Students are read `chunk_size` at a time with their submissions and quiz
+    results for the course, so memory use depends on the chunk size, not on
+    how many students the course has.
+    """
+    assignments = list(Assignment.objects.filter(course=course).order_by('due_date', 'id').only('id', 'title'))
+    quizzes = list(Quiz.objects.filter(course=course).order_by('id').only('id', 'title'))
+    yield header(assignments, quizzes)
+
+    enrollments = (
+        Enrollment.objects.filter(course=course)
+        .order_by('student__username')
+        .values_list(
+            'student_id', 'student__username', 'student__first_name', 'student__last_name',
+            'student__student_id', 'progress__total_marks',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    while chunk := list(islice(enrollments, chunk_size)):
+        student_ids = [row[0] for row in chunk]
+        submissions = {
+            (student_id, assignment_id): (marks, submitted_at)
+            for student_id, assignment_id, marks, submitted_at in Submission.objects.filter(
+                assignment__course=course, student_id__in=student_ids,
+            ).values_list('student_id', 'assignment_id', 'marks', 'submitted_at')
+        }
+        scores = {
+            (student_id, quiz_id): score
+            for student_id, quiz_id, score in QuizResult.objects.filter(
+                quiz__course=course, student_id__in=student_ids,
+            ).values_list('student_id', 'quiz_id', 'score')
+        }
+        for student_id, username, first_name, last_name, university_id, total_marks in chunk:
+            row = [username, first_name, last_name, university_id or '']
+            for assignment in assignments:
+                marks, submitted_at = submissions.get((student_id, assignment.id), (None, None))
+                row += [_blank(marks), _submitted_at(submitted_at)]
+            row += [_blank(scores.get((student_id, quiz.id))) for quiz in quizzes]
+            row.append(_blank(total_marks))
+            yield row
+
+
+def stream_csv(course, chunk_size=CHUNK_SIZE):
+    """Yield the gradebook of `course` as CSV text, a chunk of rows at a time."""
+    writer = csv.writer(_Echo())
+    rows_iter = rows(course, chunk_size)
+    while chunk := list(islice(rows_iter, chunk_size)):
+        yield ''.join(writer.writerow(row) for row in chunk)
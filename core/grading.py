@@ -0,0 +1,104 @@
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import analytics, progress
+from .models import Enrollment, Submission
+
+
+MAX_MARKS = 100
+
+
+def _parse_marks(value, label):
+    try:
+        marks = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{label}: {value!r} is not a whole number.")
+    if not 0 <= marks <= MAX_MARKS:
+        raise ValidationError(f"{label}: marks must be between 0 and {MAX_MARKS}.")
+    return marks
+
+
+def marks_from_post(data):
+    """{submission id: marks} from a grading form's `marks_<id>` fields.
+
+    Blank fields are left out. If `submission_id` is present (a single row's
+    Save button), only that row is taken.
+    """
+    only = data.get('submission_id')
+    marks = {}
+    for name, value in data.items():
+        if not name.startswith('marks_') or value.strip() == '':
+            continue
+        submission_id = name.removeprefix('marks_')
+        if not submission_id.isdigit() or (only and submission_id != only):
+            continue
+        marks[int(submission_id)] = _parse_marks(value, f"Submission {submission_id}")
+    return marks
+
+
+def marks_from_csv(fh, assignment):
+    """{submission id: marks} from a CSV with a `marks` column and either a
+    `submission` (id) or a `student` (username) column."""
+    if isinstance(fh.read(0), bytes):
+        fh = io.TextIOWrapper(fh, encoding='utf-8-sig')
+    reader = csv.DictReader(fh)
+    columns = reader.fieldnames or []
+    if 'marks' not in columns or not {'submission', 'student'} & set(columns):
+        raise ValidationError("The CSV file needs a 'marks' column and a 'submission' or 'student' column.")
+
+    by_username = None
+    if 'submission' not in columns:
+        by_username = dict(
+            Submission.objects.filter(assignment=assignment).values_list('student__username', 'id')
+        )
+
+    marks = {}
+    for line, row in enumerate(reader, start=2):
+        if (row.get('marks') or '').strip() == '':
+            continue
+        if by_username is None:
+            submission_id = row['submission']
+            if not (submission_id or '').strip().isdigit():
+                raise ValidationError(f"Line {line}: invalid submission id {submission_id!r}.")
+            submission_id = int(submission_id)
+        else:
+            username = (row['student'] or '').strip()
+            if username not in by_username:
+                raise ValidationError(f"Line {line}: {username!r} has no submission for this assignment.")
+            submission_id = by_username[username]
+        marks[submission_id] = _parse_marks(row['marks'], f"Line {line}")
+    return marks
+
+
+def apply_marks(assignment, marks):
+    """Write {submission id: marks} for `assignment` and return how many changed.
+
+    Every id must be a submission of `assignment`; otherwise nothing is
+    written. Changed rows go out in one bulk_update(), which sends no
+    signals, so the affected students' progress rows and the course's
+    analytics are refreshed here.
+    """
+    submissions = list(
+        Submission.objects.filter(assignment=assignment, pk__in=marks).only('id', 'student_id', 'marks')
+    )
+    unknown = set(marks) - {sub.pk for sub in submissions}
+    if unknown:
+        raise ValidationError(
+            f"Not submissions of this assignment: {', '.join(map(str, sorted(unknown)))}."
+        )
+
+    changed = [sub for sub in submissions if sub.marks != marks[sub.pk]]
+    for sub in changed:
+        sub.marks = marks[sub.pk]
+    if changed:
+        with transaction.atomic():
+            Submission.objects.bulk_update(changed, ['marks'])
+            progress.rebuild(Enrollment.objects.filter(
+                course_id=assignment.course_id,
+                student_id__in={sub.student_id for sub in changed},
+            ))
+        analytics.invalidate(assignment.course_id)
+    return len(changed)
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from .models import EnrollmentProgress, QuizResult
+
+
+# A leaderboard is a materialized `rank` column: 1 + the number of rows of
+# the same course (or quiz) with a strictly higher score, so ties share a
+# rank ("1, 2, 2, 4"). Reading the top N is an index range on
+# (partition, rank) and "my rank" is a single row lookup.
+#
+# When one score moves from `old` to `new`, only the rows whose scores lie
+# between the two change rank, by exactly one, so a write costs one UPDATE
+# over that range and one COUNT instead of re-sorting the whole board.
+
+class Leaderboard:
+    def __init__(self, model, partition, score):
+        self.model = model
+        self.partition = partition
+        self.score = score
+
+    def rows(self, key):
+        return self.model.objects.filter(**{self.partition: key})
+
+    def place(self, key, pk, score):
+        """Set row `pk`'s own rank from its score; returns the rank."""
+        rank = self.rows(key).filter(**{f'{self.score}__gt': score}).count() + 1
+        self.model.objects.filter(pk=pk).update(rank=rank)
+        return rank
+
+    def moved(self, key, pk, old, new):
+        """Re-rank after row `pk`'s score went from `old` to `new`; returns
+        the row's new rank.
+
+        `old` is None for a new row and `new` is None for a deleted one.
+        """
+        return self.moved_many(key, [(pk, old, new)]).get(pk)
+
+    def moved_many(self, key, changes):
+        """moved() for several (pk, old, new) rows of one partition at once.
+
+        Every other row shifts by one for each change whose range covers
+        its score, independently of the other changes; the changed rows
+        themselves are placed afterwards from the final scores. Returns
+        {pk: new rank}.
+        """
+        score = self.score
+        with transaction.atomic():
+            others = self.rows(key).exclude(pk__in=[pk for pk, _, _ in changes])
+            for pk, old, new in changes:
+                if old == new:
+                    continue
+                if old is None:
+                    others.filter(**{f'{score}__lt': new}).update(rank=F('rank') + 1)
+                elif new is None:
+                    others.filter(**{f'{score}__lt': old}).update(rank=F('rank') - 1)
+                elif new > old:
+                    others.filter(**{f'{score}__gte': old, f'{score}__lt': new}).update(rank=F('rank') + 1)
+                else:
+                    others.filter(**{f'{score}__gte': new, f'{score}__lt': old}).update(rank=F('rank') - 1)
+            return {pk: self.place(key, pk, new) for pk, _, new in changes if new is not None}
+
+    def rerank(self, keys, batch_size=1000):
+        """Recompute every rank of the given partitions from scratch."""
+        ranked = (
+            self.model.objects.filter(**{f'{self.partition}__in': keys})
+            .annotate(new_rank=Window(Rank(), partition_by=F(self.partition), order_by=F(self.score).desc()))
+            .only('pk', 'rank')
+        )
+        changed = []
+        for row in ranked.iterator(chunk_size=batch_size):
+            if row.rank != row.new_rank:
+                row.rank = row.new_rank
+                changed.append(row)
+        self.model.objects.bulk_update(changed, ['rank'], batch_size=batch_size)
+        return len(changed)
+
+    def top(self, key, limit):
+        return self.rows(key).order_by('rank', 'pk')[:limit]
+
+
+courses = Leaderboard(EnrollmentProgress, 'course_id', 'total_marks')
+quizzes = Leaderboard(QuizResult, 'quiz_id', 'score')
+
+
+def course_top(course_id, limit):
+    return courses.top(course_id, limit).select_related('enrollment__student')
+
+
+def quiz_top(quiz_id, limit):
+    return quizzes.top(quiz_id, limit).select_related('student')
+
+
+def rebuild():
+    """Recompute every leaderboard; returns the number of ranks corrected."""
+    course_ids = EnrollmentProgress.objects.values_list('course_id', flat=True).distinct()
+    quiz_ids = QuizResult.objects.values_list('quiz_id', flat=True).distinct()
+    return courses.rerank(list(course_ids)) + quizzes.rerank(list(quiz_ids))
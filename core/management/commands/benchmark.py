@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every page in SkillBridge/urls.py through the test client and report latency "
+        "percentiles (p50/p95/p99), queries per request and response size as JSON (see core/benchmark.py). "
+        "Load a data set with seed_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per page.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per page first.")
+        parser.add_argument('--only', action='append', metavar='URL_NAME',
+                            help="Benchmark only this page (repeatable).")
+        parser.add_argument('--output', metavar='FILE', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--compare', metavar='FILE', help="A previous report to compare this run with.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        log = self.stderr.write if not options['output'] else self.stdout.write
+        try:
+            report = benchmark.run(options['requests'], options['warmup'], options['only'], log=log)
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if baseline is not None:
+            if baseline['meta']['rows'] != report['meta']['rows']:
+                log(self.style.WARNING("The data sets differ; the numbers may not be comparable."))
+            log(f"{'page':32} {'role':9} {'p50':>7} {'p95':>7} {'queries':>7}")
+            for name, role, p50, p95, queries in benchmark.compare(baseline, report):
+                log(f"{name:32} {role:9} {p50:6.2f}x {p95:6.2f}x {queries:+7d}")
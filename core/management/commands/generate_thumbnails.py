@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core import thumbnails
+
+
+class Command(BaseCommand):
+    help = "Write the resized variants of every course image and profile photo (new uploads get theirs when saved)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help="Only images that have no variants yet.")
+
+    def handle(self, *args, **options):
+        written = 0
+        for model, (field, variants) in thumbnails.FIELDS.items():
+            for fieldfile in self._images(model, field):
+                if options['missing']:
+                    storage = fieldfile.storage
+                    todo = [v for v in variants if not storage.exists(thumbnails.variant_name(fieldfile.name, v))]
+                else:
+                    todo = variants
+                if todo:
+                    written += len(thumbnails.generate(fieldfile, todo))
+        self.stdout.write(self.style.SUCCESS(f"{written} image variants written."))
+
+    def _images(self, model, field):
+        for obj in model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).only('pk', field).iterator():
+            yield getattr(obj, field)
@@ -0,0 +1,39 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core import enrollments
+
+
+class Command(BaseCommand):
+    help = (
+        "Enroll students in courses from a CSV or JSON file (see core/enrollments.py). "
+        "Existing enrollments are skipped, so re-running an import is safe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--course', type=int, action='append', dest='courses', default=[],
+                            help="Course id for rows that don't name one (repeatable).")
+        parser.add_argument('--format', choices=enrollments.FORMATS,
+                            help="File format (default: from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or enrollments.guess_format(options['path'])
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as fh:
+                result = enrollments.bulk_enroll(
+                    enrollments.read_rows(fh, fmt),
+                    courses=options['courses'],
+                    batch_size=options['batch_size'],
+                )
+        except OSError as e:
+            raise CommandError(e)
+        except ValidationError as e:
+            raise CommandError(e.message)
+
+        if result.unknown_students:
+            self.stderr.write(f"Unknown students: {', '.join(sorted(result.unknown_students))}")
+        if result.unknown_courses:
+            self.stderr.write(f"Unknown courses: {', '.join(map(str, sorted(result.unknown_courses)))}")
+        self.stdout.write(self.style.SUCCESS(f"Import finished: {result}."))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import certificates
+from core.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the certificate of every student who has completed a course, "
+        "in parallel, into the certificate cache (and optionally a ZIP file)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Rendering processes (default: CERTIFICATE_WORKERS or one per CPU).")
+        parser.add_argument('--zip', dest='zip_path', help="Also write all certificates to this ZIP file.")
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.select_related('mentor').get(pk=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} does not exist.")
+
+        jobs = certificates.cohort_jobs(course)
+        if not jobs:
+            self.stdout.write("No student has completed this course yet.")
+            return
+
+        start = time.perf_counter()
+        files = certificates.render_many(jobs, workers=options['workers'])
+        if options['zip_path']:
+            with open(options['zip_path'], 'wb') as fh:
+                for chunk in certificates.stream_zip(files):
+                    fh.write(chunk)
+        else:
+            for _ in files:
+                pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Issued {len(jobs)} certificates for {course.title!r} in {time.perf_counter() - start:.1f}s."
+        ))
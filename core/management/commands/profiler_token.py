@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from core.profiling import make_token
+
+
+class Command(BaseCommand):
+    help = "Issue a signed token that turns on the request profiler for a staff user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+        if not user.is_staff:
+            raise CommandError("Only staff users can profile requests.")
+
+        token = make_token(user)
+        self.stdout.write(token)
+        self.stderr.write(f"Send it as `X-Profile: {token}` or `?_profile={token}`.")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recompute every course and quiz leaderboard rank from scratch (they are normally kept up to date incrementally)."
+
+    def handle(self, *args, **options):
+        corrected = leaderboards.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboards rebuilt; {corrected} ranks corrected."))
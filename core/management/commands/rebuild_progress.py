@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import progress
+from core.models import Enrollment
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized EnrollmentProgress rows from submissions and quiz results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help="Only rebuild this course id (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options['courses']:
+            enrollments = enrollments.filter(course_id__in=options['courses'])
+
+        count = progress.rebuild(enrollments, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress for {count} enrollments."))
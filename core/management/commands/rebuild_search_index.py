@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Repopulate the FTS5 course search index from the Course and User tables."
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError("The FTS5 search index is only used on SQLite.")
+
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Course search index rebuilt."))
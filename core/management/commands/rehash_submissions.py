@@ -0,0 +1,55 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+
+from core import uploads
+from core.models import Submission
+
+
+class Command(BaseCommand):
+    help = (
+        "Move submission files saved before content-addressed storage into it, "
+        "deduplicating identical files. Safe to run more than once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-old', action='store_true', help="Delete each old file once moved.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        storage = Submission._meta.get_field('file').storage
+        moved = missing = 0
+        batch, old_names = [], []
+
+        def flush():
+            Submission.objects.bulk_update(batch, ['file', 'original_name'])
+            # Only once the rows point at the new files.
+            if options['delete_old']:
+                for name in old_names:
+                    storage.delete(name)
+            batch.clear()
+            old_names.clear()
+
+        submissions = Submission.objects.exclude(file='').exclude(file=None).only('id', 'file', 'original_name')
+        for submission in submissions.iterator():
+            old_name = submission.file.name
+            if not storage.exists(old_name):
+                missing += 1
+                continue
+            with storage.open(old_name) as fh:
+                new_name = uploads.hashed_name('submissions', fh, old_name)
+                if new_name == old_name:
+                    continue
+                storage.save(new_name, fh)
+            if not submission.original_name:
+                # The new name is a hash; keep what the student called the file.
+                submission.original_name = posixpath.basename(old_name)[:255]
+            submission.file.name = new_name
+            batch.append(submission)
+            old_names.append(old_name)
+            moved += 1
+            if len(batch) >= options['batch_size']:
+                flush()
+        flush()
+
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} submission files ({missing} missing on disk)."))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seed
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, courses, lessons, assignments, submissions, quizzes and "
+        f"results for load testing (see core/seed.py). Every user's password is '{seed.PASSWORD}'. "
+        "Submission rows point at files that are not written."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in seed.DEFAULTS.items():
+            kind = float if isinstance(default, float) else int
+            parser.add_argument(f"--{name.replace('_', '-')}", type=kind, dest=name,
+                                help=f"Default: {default}.")
+        parser.add_argument('--prefix', default='load', help="Username prefix; must not be in use yet.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users named '{prefix}_...' already exist; pick another --prefix.")
+
+        started = time.monotonic()
+        volumes = {name: options[name] for name in seed.DEFAULTS}
+        counts = seed.generate(
+            prefix=prefix, seed=options['seed'], batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(f"  {message} ({time.monotonic() - started:.1f}s)"),
+            **volumes,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {sum(counts.values())} rows in {time.monotonic() - started:.1f}s: "
+            + ', '.join(f"{n} {name}" for name, n in counts.items())
+        ))
@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import db_router
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the read replica (SKILLBRIDGE_REPLICA_DB) with SQLite's "
+        "online backup, so readers of the replica see each copy appear at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, metavar='SECONDS',
+                            help="Keep syncing at this interval instead of once.")
+
+    def handle(self, *args, **options):
+        if db_router.REPLICA not in settings.DATABASES:
+            raise CommandError("No replica configured; set SKILLBRIDGE_REPLICA_DB.")
+        primary = settings.DATABASES['default']['NAME']
+        replica = settings.DATABASES[db_router.REPLICA]['NAME']
+        while True:
+            started = time.monotonic()
+            self._copy(primary, replica)
+            self.stdout.write(f"Replica synced in {time.monotonic() - started:.2f}s.")
+            if not options['every']:
+                break
+            time.sleep(max(0, options['every'] - (time.monotonic() - started)))
+
+    def _copy(self, primary, replica):
+        source = sqlite3.connect(primary, timeout=30)
+        target = sqlite3.connect(replica, timeout=30)
+        try:
+            # One step: a consistent snapshot, and WAL lets writers carry on.
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,192 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from .models import Submission
+
+
+# Everything under MEDIA_ROOT is served by serve() below. A file's name
+# never changes what it holds: submissions are named by their hash (see
+# core/uploads.py), uploads that collide get a new name rather than
+# overwriting, and thumbnails follow their source. So every response can be
+# cached for a year; only who may see it differs.
+CACHE_MAX_AGE = 60 * 60 * 24 * 365
+CHUNK_SIZE = 64 * 1024
+
+# Types a browser may display in a tab; anything else a student uploaded
+# (HTML, SVG, ...) is sent as a download so it can't run on our origin.
+INLINE_TYPES = {'application/pdf', 'image/gif', 'image/jpeg', 'image/png', 'image/webp'}
+
+
+def _area(name):
+    # thumbs/course_images/x.png.card.webp is governed like course_images/x.png.
+    parts = name.split('/')
+    if parts[0] == 'thumbs':
+        parts = parts[1:]
+    return parts[0] if len(parts) > 1 else None
+
+
+def _visible_submission(user, name):
+    # Identical uploads share one file, so pick a row this user may see:
+    # their own, or one in a course they teach.
+    rows = Submission.objects.filter(file=name)
+    if not user.is_staff:
+        rows = rows.filter(Q(student=user) | Q(assignment__course__mentor=user))
+    return rows.order_by('pk').values('original_name').first()
+
+
+def _download_name(submission, name):
+    """The filename to offer for a submission file: what was uploaded, or
+    the stored name for files from before that was recorded."""
+    return (submission and submission['original_name']) or posixpath.basename(name)
+
+
+def check_access(user, name):
+    """Raise unless `user` may fetch media file `name`; returns (public,
+    submission): whether the file is public (cacheable by shared caches), and
+    for a submission file the row it was allowed through."""
+    # The rules go by the first directory, so "course_images/../submissions/..."
+    # must not reach them.
+    if posixpath.normpath(name) != name or name.startswith('/'):
+        raise Http404
+    area = _area(name)
+    if area == 'course_images':
+        return True, None
+    if area not in ('profile_photos', 'submissions'):
+        raise Http404
+    if not user.is_authenticated:
+        raise PermissionDenied
+    submission = None
+    if area == 'submissions':
+        submission = _visible_submission(user, name)
+        if submission is None and not user.is_staff:
+            raise PermissionDenied
+    return False, submission
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def byte_range(header, size):
+    """(first, last) byte of a single-range Range header, or None to send
+    the whole file (no header, a form we don't handle, or several ranges;
+    a server may always ignore Range). Raises RangeNotSatisfiable."""
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # "bytes=-500": the last 500 bytes.
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable
+    return first, last
+
+
+def _read(path, first, last):
+    with open(path, 'rb') as fh:
+        fh.seek(first)
+        remaining = last - first + 1
+        while remaining:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _etag(name, stat):
+    if name.startswith('submissions/'):
+        # The name is the sha256 of the content.
+        return quote_etag(posixpath.splitext(posixpath.basename(name))[0])
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def _offload(name, path):
+    # Let the front-end server send the bytes (and handle Range itself).
+    mode = settings.MEDIA_SENDFILE
+    response = HttpResponse()
+    if mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + name
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        raise ValueError(f"Unknown MEDIA_SENDFILE: {mode!r}")
+    return response
+
+
+def serve(request, name):
+    """Response for media file `name`, honouring access rules, If-None-Match
+    / If-Modified-Since, and a single Range."""
+    public, submission = check_access(request.user, name)
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    etag = _etag(name, stat)
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = _body(request, name, path, stat, etag)
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if response.status_code in (200, 206):
+        response['Content-Type'] = content_type
+    if _area(name) == 'submissions':
+        response['Content-Disposition'] = content_disposition_header(
+            content_type not in INLINE_TYPES, _download_name(submission, name),
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if public:
+        patch_cache_control(response, public=True, max_age=CACHE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=CACHE_MAX_AGE, immutable=True)
+    return response
+
+
+def _body(request, name, path, stat, etag):
+    if settings.MEDIA_SENDFILE:
+        return _offload(name, path)
+
+    size = stat.st_size
+    # If-Range: only send the part if the client's copy is still current.
+    if request.headers.get('If-Range', etag) != etag:
+        requested = None
+    else:
+        try:
+            requested = byte_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if requested is None:
+        response = FileResponse(open(path, 'rb'))
+    else:
+        first, last = requested
+        response = StreamingHttpResponse(_read(path, first, last), status=206)
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = last - first + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
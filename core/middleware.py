@@ -0,0 +1,79 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from . import db_router, profiling
+
+
+# On-demand profiler: staff only, and only when the request carries a token
+# minted by `manage.py profiler_token <username>`. With TEMPLATE_TIMING on,
+# every other request gets the cheap version: timings in a header, no report.
+class RequestProfilerMiddleware:
+    # Both, so that under ASGI async views stay async (one sync-only
+    # middleware makes Django run the whole chain in threads).
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _token(self, request):
+        if not getattr(settings, 'PROFILER_ENABLED', True):
+            return None
+        return request.headers.get('X-Profile') or request.GET.get('_profile')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = self._token(request)
+        if token and profiling.check_token(token, request.user):
+            return self._profile(self.get_response, request)
+        if settings.TEMPLATE_TIMING:
+            return self._time(self.get_response, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        token = self._token(request)
+        if token and profiling.check_token(token, await request.auser()):
+            profile = self._profile
+        elif settings.TEMPLATE_TIMING:
+            profile = self._time
+        else:
+            return await self.get_response(request)
+        # The profiler is synchronous. Run it in a thread and the rest of the
+        # chain through async_to_sync(); queries on other threads still reach
+        # it, through the context they inherit (see core/profiling.py).
+        return await sync_to_async(profile)(async_to_sync(self.get_response), request)
+
+    def _profile(self, get_response, request):
+        profiler = profiling.RequestProfiler(request)
+        response = profiler.run(get_response, request)
+        profiler.save(response)
+        response['Server-Timing'] = profiler.server_timing()
+        response['X-Profile-Id'] = profiler.id
+        return response
+
+    def _time(self, get_response, request):
+        profiler = profiling.RequestProfiler(request, detailed=False)
+        response = profiler.run(get_response, request)
+        response['Server-Timing'] = profiler.server_timing()
+        return response
+
+
+# After a request writes anything (enrolling, grading, logging in, ...),
+# keep the visitor's reads on the primary for a little while, until the
+# replica has caught up (see core/db_router.py).
+class ReplicaPinMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        request._db_writes = db_router.track_writes()
+
+    def process_response(self, request, response):
+        log = getattr(request, '_db_writes', None)
+        if log is not None and log.wrote and db_router.REPLICA in settings.DATABASES:
+            response.set_cookie(
+                db_router.PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-18 02:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_progress(apps, schema_editor):
+    Enrollment = apps.get_model('core', 'Enrollment')
+    EnrollmentProgress = apps.get_model('core', 'EnrollmentProgress')
+    Assignment = apps.get_model('core', 'Assignment')
+    Quiz = apps.get_model('core', 'Quiz')
+    Submission = apps.get_model('core', 'Submission')
+    QuizResult = apps.get_model('core', 'QuizResult')
+
+    assignments = dict(Assignment.objects.values('course_id').annotate(n=Count('id')).values_list('course_id', 'n'))
+    quizzes = dict(Quiz.objects.values('course_id').annotate(n=Count('id')).values_list('course_id', 'n'))
+    submissions = {
+        (r['student_id'], r['assignment__course_id']): r
+        for r in Submission.objects.values('student_id', 'assignment__course_id').annotate(n=Count('id'), marks=Sum('marks'))
+    }
+    results = {
+        (r['student_id'], r['quiz__course_id']): r
+        for r in QuizResult.objects.values('student_id', 'quiz__course_id').annotate(n=Count('id'), score=Sum('score'))
+    }
+
+    rows = []
+    for enrollment in Enrollment.objects.all():
+        key = (enrollment.student_id, enrollment.course_id)
+        sub = submissions.get(key, {})
+        res = results.get(key, {})
+        rows.append(EnrollmentProgress(
+            enrollment=enrollment,
+            total_assignments=assignments.get(enrollment.course_id, 0),
+            submitted_assignments=sub.get('n', 0),
+            total_quizzes=quizzes.get(enrollment.course_id, 0),
+            attempted_quizzes=res.get('n', 0),
+            total_marks=(sub.get('marks') or 0) + (res.get('score') or 0),
+        ))
+    EnrollmentProgress.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_course_course_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_assignments', models.IntegerField(default=0)),
+                ('submitted_assignments', models.IntegerField(default=0)),
+                ('total_quizzes', models.IntegerField(default=0)),
+                ('attempted_quizzes', models.IntegerField(default=0)),
+                ('total_marks', models.IntegerField(default=0)),
+                ('certificate_eligible', models.GeneratedField(db_persist=True, expression=models.ExpressionWrapper(models.Q(('submitted_assignments__gte', models.F('total_assignments')), ('attempted_quizzes__gte', models.F('total_quizzes'))), output_field=models.BooleanField()), output_field=models.BooleanField())),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='core.enrollment')),
+            ],
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
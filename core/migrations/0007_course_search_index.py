@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 02:11
+
+import core.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends fall back to icontains search.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in core.search.CREATE_SQL + core.search.REBUILD_SQL:
+        schema_editor.execute(sql, params=None)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in core.search.DROP_SQL:
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_enrollmentprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchIndex',
+            fields=[
+                ('course', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='core.course')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('mentor_name', models.TextField()),
+                ('document', core.search.SearchDocumentField(db_column='core_course_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'core_course_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
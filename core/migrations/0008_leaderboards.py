@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Window
+from django.db.models.functions import Rank
+
+
+def backfill_leaderboards(apps, schema_editor):
+    Enrollment = apps.get_model('core', 'Enrollment')
+    EnrollmentProgress = apps.get_model('core', 'EnrollmentProgress')
+    QuizResult = apps.get_model('core', 'QuizResult')
+
+    EnrollmentProgress.objects.update(
+        course_id=Subquery(Enrollment.objects.filter(pk=OuterRef('enrollment_id')).values('course_id')[:1])
+    )
+    for model, partition, score in (
+        (EnrollmentProgress, 'course_id', 'total_marks'),
+        (QuizResult, 'quiz_id', 'score'),
+    ):
+        rows = list(model.objects.annotate(
+            new_rank=Window(Rank(), partition_by=F(partition), order_by=F(score).desc())
+        ).only('pk'))
+        for row in rows:
+            row.rank = row.new_rank
+        model.objects.bulk_update(rows, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollmentprogress',
+            name='course',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.course'),
+        ),
+        migrations.AddField(
+            model_name='enrollmentprogress',
+            name='rank',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='quizresult',
+            name='rank',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_leaderboards, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='enrollmentprogress',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.course'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollmentprogress',
+            index=models.Index(fields=['course', 'rank'], name='progress_course_rank'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollmentprogress',
+            index=models.Index(fields=['course', 'total_marks'], name='progress_course_marks'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['quiz', 'rank'], name='quizresult_quiz_rank'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['quiz', 'score'], name='quizresult_quiz_score'),
+        ),
+    ]
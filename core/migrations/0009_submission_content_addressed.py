@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 02:45
+
+import core.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='submission',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=core.uploads.ContentAddressedStorage(), upload_to=core.uploads.submission_upload_to),
+        ),
+    ]
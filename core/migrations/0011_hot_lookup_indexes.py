@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-18 02:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0010_submission_file_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='course',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='core.course'),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='course',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='core.course'),
+        ),
+        migrations.AlterField(
+            model_name='quizresult',
+            name='student',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='assignment',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.assignment'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='student',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'role': 'student'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['course', 'due_date'], name='assignment_course_due'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['course', 'order'], name='lesson_course_order'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['student', '-attempted_at', '-id'], name='quizresult_student_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['assignment', 'student'], name='submission_assignment_student'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['assignment', 'submitted_at'], name='submission_assignment_time'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['student', '-submitted_at', '-id'], name='submission_student_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role'], name='user_role'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 03:29
+
+import posixpath
+
+from django.db import migrations, models
+
+
+def backfill_original_names(apps, schema_editor):
+    # Files not yet moved by rehash_submissions still have the name they were
+    # uploaded with; keep it before the move replaces it with a hash. Files
+    # already named by their hash have nothing to keep, and are most rows.
+    Submission = apps.get_model('core', 'Submission')
+    legacy = Submission.objects.exclude(file='').exclude(file=None).exclude(
+        file__regex=r'^submissions/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[^/]*)?$',
+    )
+    rows = [
+        Submission(pk=pk, original_name=posixpath.basename(name)[:255])
+        for pk, name in legacy.values_list('pk', 'file')
+    ]
+    Submission.objects.bulk_update(rows, ['original_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_original_names, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,9 @@ from django.utils import timezone
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from .search import SearchDocumentField
+from .uploads import ContentAddressedStorage, submission_upload_to
+
 # 1. Custom User Model
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -41,6 +44,12 @@ class User(AbstractUser):
     preferred_track = models.CharField(max_length=20, choices=TRACK_CHOICES, blank=True, null=True)
     learning_goal = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # The catalog's mentor filter.
+            models.Index(fields=['role'], name='user_role'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -66,7 +75,8 @@ class Course(models.Model):
 
 # 3. Lesson Model 
 class Lesson(models.Model):
-    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lessons')
+    # Indexed by lesson_course_order below.
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lessons', db_index=False)
     title = models.CharField(max_length=200)
     video_url = models.URLField(max_length=300, blank=True, null=True)
     content = models.TextField()
@@ -74,6 +84,9 @@ class Lesson(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['course', 'order'], name='lesson_course_order'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -119,27 +132,49 @@ class Enrollment(models.Model):
 
 # 5. Assignment Model
 class Assignment(models.Model):
-    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='assignments')
+    # Indexed by assignment_course_due below.
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='assignments', db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField()
     due_date = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'due_date'], name='assignment_course_due'),
+        ]
+
     def __str__(self):
         return self.title
 
 
 # 6. Submission Model
 class Submission(models.Model):
-    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE)
+    # Both foreign keys are indexed by the composite indexes below.
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, db_index=False)
     student = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         limit_choices_to={'role': 'student'},
+        db_index=False,
+    )
+    file = models.FileField(
+        upload_to=submission_upload_to, storage=ContentAddressedStorage(), blank=True, null=True,
+        db_index=True,
     )
-    file = models.FileField(upload_to='submissions/', blank=True, null=True)
+    # The stored name is the content hash; this is what the student called it.
+    original_name = models.CharField(max_length=255, blank=True, default='')
     marks = models.IntegerField(null=True, blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # "Has this student submitted?" and the mentor's grading list.
+            models.Index(fields=['assignment', 'student'], name='submission_assignment_student'),
+            models.Index(fields=['assignment', 'submitted_at'], name='submission_assignment_time'),
+            # A student's history on the dashboard, newest first.
+            models.Index(fields=['student', '-submitted_at', '-id'], name='submission_student_recent'),
+        ]
+
     def __str__(self):
         return f"Submission by {self.student.username} for {self.assignment.title}"
 
@@ -175,16 +210,78 @@ class Choice(models.Model):
 # 8. Quiz Result Model
 class QuizResult(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    # Indexed by unique_together and quizresult_student_recent.
     student = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         limit_choices_to={'role': 'student'},
+        db_index=False,
     )
     score = models.IntegerField()
     attempted_at = models.DateTimeField(auto_now_add=True)
+    # Position on the quiz leaderboard, kept up to date by core/leaderboards.py.
+    rank = models.PositiveIntegerField(default=1)
 
     class Meta:
         unique_together = ('student', 'quiz')
+        indexes = [
+            models.Index(fields=['quiz', 'rank'], name='quizresult_quiz_rank'),
+            models.Index(fields=['quiz', 'score'], name='quizresult_quiz_score'),
+            models.Index(fields=['student', '-attempted_at', '-id'], name='quizresult_student_recent'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username}'s score: {self.score} on {self.quiz.title}"
+
+# 9. Enrollment Progress Model (denormalized; kept in sync by core/signals.py)
+class EnrollmentProgress(models.Model):
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='progress')
+    # Copied from the enrollment so a course's leaderboard is one index range.
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    total_assignments = models.IntegerField(default=0)
+    submitted_assignments = models.IntegerField(default=0)
+    total_quizzes = models.IntegerField(default=0)
+    attempted_quizzes = models.IntegerField(default=0)
+    total_marks = models.IntegerField(default=0)
+    certificate_eligible = models.GeneratedField(
+        expression=models.ExpressionWrapper(
+            models.Q(submitted_assignments__gte=models.F('total_assignments'))
+            & models.Q(attempted_quizzes__gte=models.F('total_quizzes')),
+            output_field=models.BooleanField(),
+        ),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    # Position on the course leaderboard (by total_marks), see core/leaderboards.py.
+    rank = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'rank'], name='progress_course_rank'),
+            models.Index(fields=['course', 'total_marks'], name='progress_course_marks'),
+        ]
 
     def __str__(self):
-        return f"{self.student.username}'s score: {self.score} on {self.quiz.title}"
\ No newline at end of file
+        return f"Progress of {self.enrollment}"
+
+
+# 10. Course Search Index (SQLite FTS5 virtual table, maintained by triggers)
+class CourseSearchIndex(models.Model):
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    title = models.TextField()
+    description = models.TextField()
+    mentor_name = models.TextField()
+    # FTS5 hidden columns: the one named after the table takes MATCH
+    # queries, and `rank` orders hits by the configured bm25 weights.
+    document = SearchDocumentField(db_column='core_course_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'core_course_fts'
@@ -0,0 +1,59 @@
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Lesson
+
+
+OutlineLesson = namedtuple('OutlineLesson', ['id', 'title', 'order'])
+
+
+class CourseOutline:
+    """Ordered lesson ids/titles of a course; enough to render navigation."""
+
+    def __init__(self, lessons):
+        self.lessons = lessons
+        self._index = {lesson.id: i for i, lesson in enumerate(lessons)}
+
+    def __iter__(self):
+        return iter(self.lessons)
+
+    def __len__(self):
+        return len(self.lessons)
+
+    def __getitem__(self, i):
+        return self.lessons[i]
+
+    def __contains__(self, lesson_id):
+        return lesson_id in self._index
+
+    def neighbours(self, lesson_id):
+        """(previous, next) lesson of `lesson_id`, either may be None."""
+        i = self._index.get(lesson_id)
+        if i is None:
+            return None, None
+        previous = self.lessons[i - 1] if i > 0 else None
+        following = self.lessons[i + 1] if i + 1 < len(self.lessons) else None
+        return previous, following
+
+
+def _cache_key(course_id):
+    return f'course:{course_id}:outline'
+
+
+def get(course_id):
+    lessons = cache.get(_cache_key(course_id))
+    if lessons is None:
+        # Cached until the next lesson change, so never from the replica.
+        lessons = [
+            OutlineLesson(*row)
+            for row in Lesson.objects.using(DEFAULT_DB_ALIAS).filter(course_id=course_id)
+            .order_by('order', 'id').values_list('id', 'title', 'order')
+        ]
+        cache.set(_cache_key(course_id), lessons, timeout=None)
+    return CourseOutline(lessons)
+
+
+def invalidate(course_id):
+    cache.delete(_cache_key(course_id))
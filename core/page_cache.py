@@ -0,0 +1,119 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+
+from . import db_router
+
+
+# Whole-page cache for anonymous visitors.
+#
+# Pages are stored in the process-local 'pages' cache, but each key embeds
+# the current version token of every "scope" the page depends on (the
+# catalog, one course, ...). Tokens live in the shared default cache, so
+# invalidate() from any process makes every process miss on its next hit.
+
+def _scope_key(scope):
+    return f'page-scope:{scope}'
+
+
+def invalidate(*scopes):
+    cache.set_many({_scope_key(scope): uuid.uuid4().hex for scope in scopes}, timeout=None)
+
+
+def _versions(scopes):
+    keys = [_scope_key(scope) for scope in scopes]
+    tokens = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in tokens}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        tokens.update(missing)
+    return [tokens[key] for key in keys]
+
+
+def _page_key(request, scopes):
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    raw = '|'.join([request.path, query, *_versions(scopes)])
+    return 'page:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _is_cacheable(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # A pending flash message (e.g. "You have successfully logged out")
+    # makes the page personal; don't serve or store it. MESSAGE_STORAGE
+    # keeps them all in their cookie.
+    return CookieStorage.cookie_name not in request.COOKIES
+
+
+def _is_personal(request, response):
+    # Anything that sets a cookie (CSRF token, session) is per-visitor. The
+    # middleware adds those cookies after the view returns, so also look at
+    # what the view asked for.
+    return bool(
+        response.cookies
+        or request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+        or request.session.modified
+    )
+
+
+def _lookup(request, scopes, args, kwargs):
+    """(key, cached response or None); key is None if the request can't be
+    served from or stored in the cache."""
+    if not _is_cacheable(request):
+        return None, None
+    key = _page_key(request, scopes(request, *args, **kwargs))
+    cached = caches['pages'].get(key)
+    if cached is None:
+        # This render will be served to everyone until the scope changes.
+        db_router.read_from_primary(request)
+        return key, None
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = 'hit'
+    return key, response
+
+
+def _store(request, key, response):
+    if response.status_code == 200 and not response.streaming and not _is_personal(request, response):
+        caches['pages'].set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+        response['X-Page-Cache'] = 'miss'
+
+
+def anonymous_page(scopes):
+    """Cache a view's full response for anonymous users.
+
+    `scopes(request, *args, **kwargs)` names what the page shows, e.g.
+    ['catalog'] or ['course:7']; see invalidate(). Works on sync and async
+    views.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # The session, user and version-token lookups are blocking.
+                key, response = await sync_to_async(_lookup)(request, scopes, args, kwargs)
+                if response is not None:
+                    return response
+                response = await view(request, *args, **kwargs)
+                if key is not None:
+                    await sync_to_async(_store)(request, key, response)
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key, response = _lookup(request, scopes, args, kwargs)
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if key is not None:
+                _store(request, key, response)
+            return response
+        return wrapper
+    return decorator
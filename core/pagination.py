@@ -0,0 +1,73 @@
+import datetime
+
+from django.core import signing
+from django.core.exceptions import BadRequest
+from django.db.models import F, Q
+
+
+SALT = 'core.pagination'
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode(values):
+    values = [v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v for v in values]
+    return signing.dumps(values, salt=SALT, compress=True)
+
+
+def _decode(cursor, size):
+    try:
+        values = signing.loads(cursor, salt=SALT)
+    except signing.BadSignature:
+        raise BadRequest("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise BadRequest("Invalid cursor.")
+    return values
+
+
+def _after(fields, values):
+    # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), per-column direction.
+    condition = Q()
+    for i, (name, descending) in enumerate(fields):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+        for j, (prev_name, _) in enumerate(fields[:i]):
+            step &= Q(**{prev_name: values[j]})
+        condition |= step
+    return condition
+
+
+def paginate(queryset, ordering, cursor=None, per_page=20):
+    """Return one KeysetPage of `queryset` ordered by `ordering`.
+
+    `ordering` must end in a unique column (normally the pk) so the order is
+    total; the cursor is a signed, opaque encoding of the last row's key.
+    Rows are found with a WHERE on the key, so page N costs the same as page 1.
+    """
+    fields = [(f.lstrip('-'), f.startswith('-')) for f in ordering]
+    queryset = queryset.order_by(*ordering).annotate(
+        **{f'_key{i}': F(name) for i, (name, _) in enumerate(fields)}
+    )
+    if cursor:
+        queryset = queryset.filter(_after(fields, _decode(cursor, len(fields))))
+
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = _encode([getattr(last, f'_key{i}') for i in range(len(fields))])
+    return KeysetPage(items, next_cursor)
@@ -0,0 +1,236 @@
+import json
+import os
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+
+
+SALT = 'core.profiling'
+
+_active = ContextVar('core_profiler', default=None)
+_template_hook_installed = False
+
+
+def make_token(user):
+    """Token a staff member sends as ?_profile=<token> or X-Profile: <token>."""
+    return signing.TimestampSigner(salt=SALT).sign(str(user.pk))
+
+
+def check_token(token, user):
+    if not token or not user.is_authenticated or not user.is_staff:
+        return False
+    max_age = getattr(settings, 'PROFILER_TOKEN_MAX_AGE', 3600)
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return value == str(user.pk)
+
+
+def current():
+    return _active.get()
+
+
+@contextmanager
+def span(name):
+    """Time a block of code into the active profiler; a no-op otherwise."""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.spans.append({'name': name, 'ms': (time.perf_counter() - start) * 1000})
+
+
+def _project_stack():
+    # Keep only frames from our own code so the report points at the view or
+    # template tag that issued the query, not at the ORM internals.
+    root = str(settings.BASE_DIR)
+    own = (__file__, os.path.join(os.path.dirname(__file__), 'middleware.py'))
+    frames = []
+    for frame in traceback.extract_stack()[:-3]:
+        if not frame.filename.startswith(root) or 'site-packages' in frame.filename:
+            continue
+        if frame.filename in own:
+            continue
+        frames.append(f"{os.path.relpath(frame.filename, root)}:{frame.lineno} in {frame.name}")
+    return frames
+
+
+def _query_hook(alias):
+    # Installed once on every connection, in every thread, and recording into
+    # whichever profiler is active. The context (and so the profiler) follows
+    # a request into sync_to_async() worker threads, such as those of
+    # core/concurrency.py, whose connections a profiler started on the
+    # request's thread would otherwise never see.
+    def hook(execute, sql, params, many, context):
+        profiler = _active.get()
+        if profiler is None:
+            return execute(sql, params, many, context)
+        return profiler._record_query(alias, execute, sql, params, many, context)
+    hook.profiling = True
+    return hook
+
+
+def _hook_connection(sender=None, connection=None, **kwargs):
+    if not any(getattr(wrapper, 'profiling', False) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(_query_hook(connection.alias))
+
+
+connection_created.connect(_hook_connection)
+
+
+def _install_template_hook():
+    # Template._render is what {% extends %} and {% include %} go through, so
+    # patching it catches every template of the page, not only the top one.
+    # BlockNode.render adds the {% block %}s, the parts a child template fills.
+    global _template_hook_installed
+    if _template_hook_installed:
+        return
+    original = Template._render
+    original_block = BlockNode.render
+
+    def _timed(render, entry):
+        def timed(self, context):
+            profiler = _active.get()
+            if profiler is None:
+                return render(self, context)
+            start = time.perf_counter()
+            try:
+                return render(self, context)
+            finally:
+                profiler.templates.append({**entry(self), 'ms': (time.perf_counter() - start) * 1000})
+        return timed
+
+    Template._render = _timed(original, lambda template: {
+        'name': template.origin.name if template.origin else '<string>',
+        'template': getattr(template.origin, 'template_name', None) or template.name,
+    })
+    # `template` is where the block is declared (e.g. base.html for
+    # "content"), whichever template's version of it is rendered.
+    BlockNode.render = _timed(original_block, lambda node: {
+        'name': node.origin.name if node.origin else '<string>',
+        'template': getattr(node.origin, 'template_name', None) or '<string>',
+        'block': node.name,
+    })
+    _template_hook_installed = True
+
+
+class RequestProfiler:
+    """Times one request's queries, templates and spans. `detailed` adds
+    each query's parameters and call stack, for the saved report."""
+
+    def __init__(self, request, detailed=True):
+        self.id = uuid.uuid4().hex
+        self.detailed = detailed
+        self.method = request.method
+        self.path = request.get_full_path()
+        self.queries = []
+        self.templates = []
+        self.spans = []
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+
+    def _record_query(self, alias, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': alias,
+                'sql': sql,
+                'params': repr(params)[:500] if self.detailed else None,
+                'many': many,
+                'ms': (time.perf_counter() - start) * 1000,
+                'stack': _project_stack() if self.detailed else None,
+            })
+
+    def run(self, get_response, request):
+        _install_template_hook()
+        # This thread's connections may predate the connection_created hook.
+        for conn in connections.all():
+            _hook_connection(connection=conn)
+        token = _active.set(self)
+        try:
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            response = get_response(request)
+            self.cpu_ms = (time.thread_time() - cpu_start) * 1000
+            self.wall_ms = (time.perf_counter() - wall_start) * 1000
+        finally:
+            _active.reset(token)
+        return response
+
+    @property
+    def db_ms(self):
+        return sum(q['ms'] for q in self.queries)
+
+    @property
+    def template_ms(self):
+        # Only the outermost render counts; nested ones are already inside it.
+        return max((t['ms'] for t in self.templates), default=0.0)
+
+    def server_timing(self):
+        parts = [
+            f'total;dur={self.wall_ms:.1f}',
+            f'cpu;dur={self.cpu_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="{len(self.queries)} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+        ]
+        for i, s in enumerate(self.spans):
+            parts.append(f'span{i};dur={s["ms"]:.1f};desc="{s["name"]}"')
+        for i, (label, (ms, n)) in enumerate(self.template_totals().items()):
+            desc = f'{label} x{n}' if n > 1 else label
+            parts.append(f'tpl{i};dur={ms:.1f};desc="{desc}"')
+        return ', '.join(parts)
+
+    def template_totals(self):
+        """{template or "template#block": (total ms, renders)}, slowest
+        first. Times include what is rendered inside, so they overlap."""
+        totals = {}
+        for t in self.templates:
+            label = f"{t['template']}#{t['block']}" if 'block' in t else t['template']
+            ms, n = totals.get(label, (0.0, 0))
+            totals[label] = (ms + t['ms'], n + 1)
+        return dict(sorted(totals.items(), key=lambda item: -item[1][0]))
+
+    def report(self, response):
+        by_sql = {}
+        for q in self.queries:
+            by_sql[q['sql']] = by_sql.get(q['sql'], 0) + 1
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': response.status_code,
+            'wall_ms': self.wall_ms,
+            'cpu_ms': self.cpu_ms,
+            'db_ms': self.db_ms,
+            'template_ms': self.template_ms,
+            'template_totals': self.template_totals(),
+            'query_count': len(self.queries),
+            'duplicate_queries': {sql: n for sql, n in by_sql.items() if n > 1},
+            'queries': self.queries,
+            'templates': self.templates,
+            'spans': self.spans,
+        }
+
+    def save(self, response):
+        directory = getattr(settings, 'PROFILER_REPORT_DIR', settings.BASE_DIR / 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.id}.json")
+        with open(path, 'w') as fh:
+            json.dump(self.report(response), fh, indent=2, default=str)
+        return path
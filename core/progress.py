@@ -0,0 +1,177 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from . import leaderboards
+from .models import Assignment, Enrollment, EnrollmentProgress, Quiz, QuizResult, Submission
+
+
+def _for_enrollment(student_id, course_id):
+    return EnrollmentProgress.objects.filter(
+        enrollment__student_id=student_id,
+        enrollment__course_id=course_id,
+    )
+
+
+def _for_course(course_id):
+    return EnrollmentProgress.objects.filter(enrollment__course_id=course_id)
+
+
+def of(enrollment):
+    """The progress row of an enrollment, built on the spot if it is missing."""
+    try:
+        return enrollment.progress
+    except EnrollmentProgress.DoesNotExist:
+        refresh(enrollment.student_id, enrollment.course_id)
+        enrollment.progress = EnrollmentProgress.objects.get(enrollment=enrollment)
+        return enrollment.progress
+
+
+# --- Incremental updates (called from core/signals.py) ---
+
+def _add(student_id, course_id, marks=0, **counts):
+    rows = _for_enrollment(student_id, course_id)
+    # One transaction for the new total, its re-read and the rank shift:
+    # otherwise a concurrent _add() can commit in between, and each write's
+    # shift would count the other's row once more.
+    with transaction.atomic():
+        rows.update(
+            total_marks=F('total_marks') + marks,
+            **{field: F(field) + count for field, count in counts.items()},
+        )
+        if marks:
+            for pk, total in rows.values_list('pk', 'total_marks'):
+                leaderboards.courses.moved(course_id, pk, total - marks, total)
+
+
+def add_submission(student_id, course_id, count=1, marks=0):
+    _add(student_id, course_id, marks, submitted_assignments=count)
+
+
+def add_quiz_result(student_id, course_id, count=1, score=0):
+    _add(student_id, course_id, score, attempted_quizzes=count)
+
+
+def add_marks(student_id, course_id, delta):
+    if delta:
+        _add(student_id, course_id, delta)
+
+
+def add_assignments(course_id, count):
+    _for_course(course_id).update(total_assignments=F('total_assignments') + count)
+
+
+def add_quizzes(course_id, count):
+    _for_course(course_id).update(total_quizzes=F('total_quizzes') + count)
+
+
+# --- Full recomputation ---
+
+def refresh(student_id, course_id):
+    """Recompute one enrollment's row from the source tables."""
+    return rebuild(Enrollment.objects.filter(student_id=student_id, course_id=course_id))
+
+
+def rebuild(enrollments=None, batch_size=500):
+    """Recompute progress rows for the given enrollments (default: all of them).
+
+    Works in batches, with one grouped query per source table per batch
+    rather than one per enrollment, and upserts each batch in one statement.
+    """
+    if enrollments is None:
+        enrollments = Enrollment.objects.all()
+    pairs = list(enrollments.order_by('pk').values_list('pk', 'student_id', 'course_id'))
+    for start in range(0, len(pairs), batch_size):
+        # One transaction per batch: its counts and its upsert see the same
+        # rows, and (core/db_router.py) its reads come from the primary.
+        with transaction.atomic():
+            _rebuild_batch(pairs[start:start + batch_size])
+    return len(pairs)
+
+
+def _rebuild_batch(pairs):
+    course_ids = {course_id for _, _, course_id in pairs}
+    student_ids = {student_id for _, student_id, _ in pairs}
+
+    assignment_totals = dict(
+        Assignment.objects.filter(course_id__in=course_ids)
+        .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+    )
+    quiz_totals = dict(
+        Quiz.objects.filter(course_id__in=course_ids)
+        .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+    )
+    submissions = {
+        (row['student_id'], row['assignment__course_id']): row
+        for row in Submission.objects.filter(
+            student_id__in=student_ids, assignment__course_id__in=course_ids,
+        ).values('student_id', 'assignment__course_id').annotate(n=Count('id'), marks=Sum('marks'))
+    }
+    results = {
+        (row['student_id'], row['quiz__course_id']): row
+        for row in QuizResult.objects.filter(
+            student_id__in=student_ids, quiz__course_id__in=course_ids,
+        ).values('student_id', 'quiz__course_id').annotate(n=Count('id'), score=Sum('score'))
+    }
+
+    old_rows = {
+        enrollment_id: (course_id, total)
+        for enrollment_id, course_id, total in EnrollmentProgress.objects.filter(
+            enrollment_id__in=[pk for pk, _, _ in pairs],
+        ).values_list('enrollment_id', 'course_id', 'total_marks')
+    }
+
+    rows = []
+    for enrollment_id, student_id, course_id in pairs:
+        sub = submissions.get((student_id, course_id), {})
+        res = results.get((student_id, course_id), {})
+        rows.append(EnrollmentProgress(
+            enrollment_id=enrollment_id,
+            course_id=course_id,
+            total_assignments=assignment_totals.get(course_id, 0),
+            submitted_assignments=sub.get('n', 0),
+            total_quizzes=quiz_totals.get(course_id, 0),
+            attempted_quizzes=res.get('n', 0),
+            total_marks=(sub.get('marks') or 0) + (res.get('score') or 0),
+        ))
+
+    EnrollmentProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['enrollment'],
+        update_fields=[
+            'course', 'total_assignments', 'submitted_assignments',
+            'total_quizzes', 'attempted_quizzes', 'total_marks',
+        ],
+    )
+    _rerank_batch(rows, old_rows)
+
+
+# A few changed totals are cheaper to move one by one; past that, sort the
+# affected courses again.
+INCREMENTAL_RERANK_LIMIT = 20
+
+
+def _rerank_batch(rows, old_rows):
+    changes, rerank = {}, set()
+    for row in rows:
+        old_course_id, old_total = old_rows.get(row.enrollment_id, (row.course_id, None))
+        if old_course_id != row.course_id:
+            # The enrollment itself was moved to another course (an admin edit).
+            rerank |= {old_course_id, row.course_id}
+        elif old_total != row.total_marks:
+            changes.setdefault(row.course_id, []).append((row.enrollment_id, old_total, row.total_marks))
+    if sum(map(len, changes.values())) > INCREMENTAL_RERANK_LIMIT:
+        rerank |= changes.keys()
+    for course_id in rerank:
+        changes.pop(course_id, None)
+
+    if rerank:
+        leaderboards.courses.rerank(rerank)
+    if changes:
+        pks = dict(
+            EnrollmentProgress.objects.filter(
+                enrollment_id__in=[enrollment_id for batch in changes.values() for enrollment_id, _, _ in batch],
+            ).values_list('enrollment_id', 'pk')
+        )
+        for course_id, batch in changes.items():
+            leaderboards.courses.moved_many(course_id, [(pks[e], old, new) for e, old, new in batch])
@@ -0,0 +1,59 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Choice
+
+
+# quiz id -> (version, answer key). The version token lives in the shared
+# Django cache so that invalidating it from one process (e.g. an admin edit)
+# makes every other process rebuild its copy on the next lookup.
+_answer_keys = {}
+
+
+def _version_key(quiz_id):
+    return f'quiz:{quiz_id}:version'
+
+
+def version(quiz_id):
+    """Opaque token that changes whenever a question or choice of the quiz does."""
+    return cache.get_or_set(_version_key(quiz_id), lambda: uuid.uuid4().hex, timeout=None)
+
+
+def invalidate(quiz_id):
+    cache.set(_version_key(quiz_id), uuid.uuid4().hex, timeout=None)
+    _answer_keys.pop(quiz_id, None)
+
+
+def answer_key(quiz_id):
+    """{question id: frozenset of correct choice ids}, built with one query."""
+    current = version(quiz_id)
+    cached = _answer_keys.get(quiz_id)
+    if cached and cached[0] == current:
+        return cached[1]
+
+    key = {}
+    # Kept until the quiz changes again, so read from the primary.
+    rows = Choice.objects.using(DEFAULT_DB_ALIAS).filter(question__quiz_id=quiz_id).values_list('question_id', 'id', 'is_correct')
+    for question_id, choice_id, is_correct in rows:
+        correct = key.setdefault(question_id, set())
+        if is_correct:
+            correct.add(choice_id)
+    key = {question_id: frozenset(ids) for question_id, ids in key.items()}
+    _answer_keys[quiz_id] = (current, key)
+    return key
+
+
+def grade(quiz_id, answers):
+    """Score a submission in memory; `answers` is the POST data.
+
+    A choice only counts if it is a correct choice *of that question*, so ids
+    from other questions or quizzes, or garbage, simply score nothing.
+    """
+    score = 0
+    for question_id, correct in answer_key(quiz_id).items():
+        selected = answers.get(f'question_{question_id}', '')
+        if selected.isdigit() and int(selected) in correct:
+            score += 1
+    return score
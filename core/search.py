@@ -0,0 +1,110 @@
+import re
+
+from django.db import connection, models
+from django.db.models import Q
+
+
+# --- SQLite FTS5 plumbing ---
+#
+# core_course_fts is an FTS5 virtual table whose rowid is the course id. It is
+# created and kept in sync by SQL triggers (see migration 0007), so it stays
+# correct for bulk_create()/update() too, where model signals never fire.
+
+FTS_TABLE = 'core_course_fts'
+
+# bm25 weights for (title, description, mentor_name): a hit in the title
+# matters more than one buried in the description.
+RANK_FUNCTION = 'bm25(10.0, 1.0, 5.0)'
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, mentor_name,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', '{RANK_FUNCTION}')",
+    f"""CREATE TRIGGER IF NOT EXISTS core_course_fts_ai AFTER INSERT ON core_course BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, mentor_name)
+        SELECT new.id, new.title, new.description, u.first_name || ' ' || u.last_name
+        FROM core_user u WHERE u.id = new.mentor_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_course_fts_au
+    AFTER UPDATE OF title, description, mentor_id ON core_course BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, title, description, mentor_name)
+        SELECT new.id, new.title, new.description, u.first_name || ' ' || u.last_name
+        FROM core_user u WHERE u.id = new.mentor_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_course_fts_ad AFTER DELETE ON core_course BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_user_fts_au
+    AFTER UPDATE OF first_name, last_name ON core_user BEGIN
+        UPDATE {FTS_TABLE} SET mentor_name = new.first_name || ' ' || new.last_name
+        WHERE rowid IN (SELECT id FROM core_course WHERE mentor_id = new.id);
+    END""",
+]
+
+REBUILD_SQL = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""INSERT INTO {FTS_TABLE}(rowid, title, description, mentor_name)
+    SELECT c.id, c.title, c.description, u.first_name || ' ' || u.last_name
+    FROM core_course c JOIN core_user u ON u.id = c.mentor_id""",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS core_user_fts_au",
+    "DROP TRIGGER IF EXISTS core_course_fts_ad",
+    "DROP TRIGGER IF EXISTS core_course_fts_au",
+    "DROP TRIGGER IF EXISTS core_course_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+class SearchDocumentField(models.TextField):
+    """The FTS5 hidden column named after the table; only usable with __match."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_query(text):
+    """Turn what the user typed into an FTS5 query: every word, as a prefix.
+
+    "pyth dja" becomes '"pyth"* "dja"*', i.e. both prefixes must match.
+    Quoting each token keeps FTS5 operators in the input from being parsed.
+    """
+    tokens = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_courses(queryset, text):
+    """Filter a Course queryset down to matches for `text`, best first."""
+    if not fts_enabled():
+        return queryset.filter(
+            Q(title__icontains=text) |
+            Q(description__icontains=text) |
+            Q(mentor__first_name__icontains=text) |
+            Q(mentor__last_name__icontains=text)
+        ).distinct()
+
+    query = build_query(text)
+    if not query:
+        return queryset.none()
+    return queryset.filter(search_index__document__match=query).order_by('search_index__rank', 'pk')
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
@@ -0,0 +1,252 @@
+import hashlib
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import page_cache
+from .models import (
+    Assignment, Choice, Course, Enrollment, EnrollmentProgress, Lesson, Question, Quiz, QuizResult, Submission, User,
+)
+
+
+# Synthetic data for load testing: `python manage.py seed_data`. Rows go in
+# with bulk_create() in batches, so signals don't fire; the denormalized
+# data they would maintain (progress rows, leaderboard ranks) is computed
+# alongside and bulk-created too. The FTS search index follows by trigger.
+
+DEFAULTS = {
+    'mentors': 20,
+    'students': 1000,
+    'courses': 50,
+    'lessons': 12,          # per course
+    'assignments': 6,       # per course
+    'quizzes': 4,           # per course
+    'questions': 8,         # per quiz
+    'choices': 4,           # per question
+    'enrollments': 5,       # courses per student
+    'submission_rate': 0.8,  # share of an enrolled student's assignments submitted
+    'attempt_rate': 0.7,     # share of an enrolled student's quizzes taken
+}
+PASSWORD = 'password'
+
+FIRST_NAMES = ['Ayesha', 'Rahim', 'Nusrat', 'Tanvir', 'Farhana', 'Imran', 'Sadia', 'Arif', 'Mim', 'Rafi']
+LAST_NAMES = ['Rahman', 'Hossain', 'Islam', 'Ahmed', 'Chowdhury', 'Khan', 'Akter', 'Uddin', 'Sarker', 'Das']
+TOPICS = ['Python', 'Django', 'Data Science', 'Networking', 'Android', 'UI Design', 'Algorithms', 'SQL',
+          'Machine Learning', 'Cloud Computing', 'Cyber Security', 'JavaScript']
+LEVELS = ['Foundations of', 'Practical', 'Advanced', 'Hands-on', 'Complete']
+
+
+@contextmanager
+def _explicit_timestamps(*fields):
+    # bulk_create() still runs pre_save(), which would stamp every
+    # auto_now_add field with "now"; seeded history needs its own dates.
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _bulk(model, objects, batch_size, pks=False):
+    """bulk_create `objects` (any iterable) a batch at a time; returns the
+    new pks if `pks`, else the number of rows."""
+    objects = iter(objects)
+    created = [] if pks else 0
+    while batch := list(islice(objects, batch_size)):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        if pks:
+            created.extend(obj.pk for obj in batch)
+        else:
+            created += len(batch)
+    return created
+
+
+def _ranks(groups, scores):
+    """Each score's leaderboard rank within its group: 1 + the number of
+    higher scores there, the same as RANK() OVER (ORDER BY score DESC)."""
+    ordered = defaultdict(list)
+    for group, score in zip(groups, scores):
+        ordered[group].append(-score)
+    for values in ordered.values():
+        values.sort()
+    return [bisect_left(ordered[group], -score) + 1 for group, score in zip(groups, scores)]
+
+
+def _name(rng):
+    return str(rng.choice(FIRST_NAMES)), str(rng.choice(LAST_NAMES))
+
+
+def _users(rng, prefix, role, count, password):
+    for i in range(count):
+        first, last = _name(rng)
+        username = f'{prefix}_{role}{i}'
+        yield User(
+            username=username, first_name=first, last_name=last, email=f'{username}@example.com',
+            role=role, password=password, student_id=f'{i:07d}' if role == 'student' else None,
+        )
+
+
+def generate(prefix='load', seed=0, batch_size=5000, log=lambda message: None, **volumes):
+    """Create a data set of the given volumes (see DEFAULTS); returns
+    {model name: rows created}. The same seed gives the same data."""
+    v = {**DEFAULTS, **{key: value for key, value in volumes.items() if value is not None}}
+    rng = np.random.default_rng(seed)
+    now = timezone.now()
+    counts = {}
+
+    password = make_password(PASSWORD)  # hashing is slow; every user shares one
+    mentor_ids = _bulk(User, _users(rng, prefix, 'mentor', v['mentors'], password), batch_size, pks=True)
+    student_ids = _bulk(User, _users(rng, prefix, 'student', v['students'], password), batch_size, pks=True)
+    counts['users'] = len(mentor_ids) + len(student_ids)
+    log(f"{counts['users']} users")
+
+    # Courses started at some point in the last year.
+    course_start = [now - timedelta(days=int(d)) for d in rng.integers(30, 365, v['courses'])]
+    with _explicit_timestamps(Course._meta.get_field('created_at')):
+        course_ids = _bulk(Course, (
+            Course(
+                title=f"{rng.choice(LEVELS)} {rng.choice(TOPICS)} {i + 1}",
+                description=f"A {v['lessons']}-lesson course with {v['assignments']} assignments.",
+                mentor_id=int(rng.choice(mentor_ids)),
+                created_at=course_start[i],
+            )
+            for i in range(v['courses'])
+        ), batch_size, pks=True)
+    counts['courses'] = len(course_ids)
+
+    counts['lessons'] = _bulk(Lesson, (
+        Lesson(course_id=course_id, title=f"Lesson {n}", content="Lesson notes. " * 40, order=n,
+               video_url='https://www.youtube.com/embed/dQw4w9WgXcQ')
+        for course_id in course_ids for n in range(1, v['lessons'] + 1)
+    ), batch_size)
+
+    # An assignment due every week or two after the course started.
+    assignment_rows = [
+        (course_id, course_start[i] + timedelta(days=10 * (n + 1)))
+        for i, course_id in enumerate(course_ids) for n in range(v['assignments'])
+    ]
+    assignment_ids = _bulk(Assignment, (
+        Assignment(course_id=course_id, title=f"Assignment {n % v['assignments'] + 1}",
+                   description="Submit a PDF.", due_date=due)
+        for n, (course_id, due) in enumerate(assignment_rows)
+    ), batch_size, pks=True)
+    counts['assignments'] = len(assignment_ids)
+
+    quiz_courses = [course_id for course_id in course_ids for _ in range(v['quizzes'])]
+    quiz_ids = _bulk(Quiz, (
+        Quiz(course_id=course_id, title=f"Quiz {n % v['quizzes'] + 1}", description="Check your understanding.",
+             total_marks=v['questions'])
+        for n, course_id in enumerate(quiz_courses)
+    ), batch_size, pks=True)
+    counts['quizzes'] = len(quiz_ids)
+
+    question_ids = _bulk(Question, (
+        Question(quiz_id=quiz_id, text=f"Question {n}?", order=n)
+        for quiz_id in quiz_ids for n in range(1, v['questions'] + 1)
+    ), batch_size, pks=True)
+    counts['questions'] = len(question_ids)
+    correct = rng.integers(0, v['choices'], len(question_ids))
+    counts['choices'] = _bulk(Choice, (
+        Choice(question_id=question_id, text=f"Option {chr(65 + c)}", is_correct=c == correct[q])
+        for q, question_id in enumerate(question_ids) for c in range(v['choices'])
+    ), batch_size)
+    log(f"{counts['courses']} courses with {counts['lessons']} lessons, {counts['assignments']} assignments, "
+        f"{counts['quizzes']} quizzes")
+
+    # Enrollments: popular courses draw more students (Zipf-like weights).
+    per_student = min(v['enrollments'], len(course_ids))
+    weights = 1 / np.arange(1, len(course_ids) + 1) ** 0.8
+    weights /= weights.sum()
+    enrolled = [
+        (student_id, int(course_index))
+        for student_id in student_ids
+        for course_index in rng.choice(len(course_ids), per_student, replace=False, p=weights)
+    ]
+    with _explicit_timestamps(Enrollment._meta.get_field('enrolled_at')):
+        enrollment_ids = _bulk(Enrollment, (
+            Enrollment(student_id=student_id, course_id=course_ids[i],
+                       enrolled_at=course_start[i] + timedelta(days=int(rng.integers(0, 20))))
+            for student_id, i in enrolled
+        ), batch_size, pks=True)
+    counts['enrollments'] = len(enrollment_ids)
+    log(f"{counts['enrollments']} enrollments")
+
+    assignments_of = [assignment_ids[i * v['assignments']:(i + 1) * v['assignments']] for i in range(len(course_ids))]
+    dues_of = [[due for _, due in assignment_rows[i * v['assignments']:(i + 1) * v['assignments']]]
+               for i in range(len(course_ids))]
+    quizzes_of = [quiz_ids[i * v['quizzes']:(i + 1) * v['quizzes']] for i in range(len(course_ids))]
+
+    # Per enrollment, for the progress rows: [submitted, attempted, total marks].
+    tally = np.zeros((len(enrolled), 3), dtype=np.int64)
+
+    def submissions():
+        for e, (student_id, i) in enumerate(enrolled):
+            ability = rng.normal(68, 12)
+            for assignment_id, due in zip(assignments_of[i], dues_of[i]):
+                if rng.random() >= v['submission_rate']:
+                    continue
+                # Most arrive in the week before the deadline, some late.
+                hours = rng.uniform(-168, 0) if rng.random() < 0.85 else rng.uniform(0, 72)
+                submitted_at = due + timedelta(hours=float(hours))
+                if submitted_at > now:
+                    continue  # not due yet; nobody has handed it in
+                marks = int(np.clip(rng.normal(ability, 10), 0, 100)) if rng.random() < 0.7 else None
+                tally[e] += (1, 0, marks or 0)
+                digest = hashlib.sha256(f'{prefix}:{student_id}:{assignment_id}'.encode()).hexdigest()
+                yield Submission(
+                    assignment_id=assignment_id, student_id=student_id,
+                    file=f'submissions/{digest[:2]}/{digest[2:4]}/{digest}.pdf',
+                    marks=marks, submitted_at=submitted_at,
+                )
+
+    with _explicit_timestamps(Submission._meta.get_field('submitted_at')):
+        counts['submissions'] = _bulk(Submission, submissions(), batch_size)
+    log(f"{counts['submissions']} submissions")
+
+    results = []  # (quiz, student, score, attempted at)
+    for e, (student_id, i) in enumerate(enrolled):
+        skill = rng.beta(5, 2)
+        for quiz_id in quizzes_of[i]:
+            if rng.random() >= v['attempt_rate']:
+                continue
+            score = int(rng.binomial(v['questions'], skill))
+            tally[e] += (0, 1, score)
+            results.append((quiz_id, student_id, score,
+                            min(now, course_start[i] + timedelta(days=float(rng.uniform(1, 60))))))
+    quiz_ranks = _ranks([row[0] for row in results], [row[2] for row in results])
+    with _explicit_timestamps(QuizResult._meta.get_field('attempted_at')):
+        counts['quiz_results'] = _bulk(QuizResult, (
+            QuizResult(quiz_id=quiz_id, student_id=student_id, score=score, attempted_at=attempted_at, rank=rank)
+            for (quiz_id, student_id, score, attempted_at), rank in zip(results, quiz_ranks)
+        ), batch_size)
+    del results, quiz_ranks
+    log(f"{counts['quiz_results']} quiz results")
+
+    # Progress and leaderboard ranks, as progress.rebuild() and
+    # leaderboards.rerank() would compute them, but without reading back
+    # what was just written (rebuilding a million rows takes far longer).
+    enrolled_courses = [course_ids[i] for _, i in enrolled]
+    course_ranks = _ranks(enrolled_courses, tally[:, 2].tolist())
+    _bulk(EnrollmentProgress, (
+        EnrollmentProgress(
+            enrollment_id=enrollment_id, course_id=course_id,
+            total_assignments=v['assignments'], submitted_assignments=int(submitted),
+            total_quizzes=v['quizzes'], attempted_quizzes=int(attempted),
+            total_marks=int(total), rank=rank,
+        )
+        for enrollment_id, course_id, (submitted, attempted, total), rank
+        in zip(enrollment_ids, enrolled_courses, tally, course_ranks)
+    ), batch_size)
+    page_cache.invalidate('catalog')
+    log("progress and leaderboards filled in")
+    return counts
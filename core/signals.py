@@ -0,0 +1,298 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.core.cache import caches
+from django.dispatch import receiver
+from django.utils.autoreload import file_changed
+
+from . import analytics, enrollments, leaderboards, outline, page_cache, progress, quizzes, thumbnails
+from .models import (
+    Assignment, Choice, Course, Enrollment, EnrollmentProgress, Lesson, Question, Quiz, QuizResult,
+    Submission, User,
+)
+
+
+def _int(value):
+    return int(value) if value not in (None, '') else 0
+
+
+def _loaded(instance, *attnames):
+    # What post_init may read: None if any of the fields was deferred with
+    # .only()/.defer(), since touching it would fetch it, once per row.
+    if any(name not in instance.__dict__ for name in attnames):
+        return None
+    return tuple(instance.__dict__[name] for name in attnames)
+
+
+def _course_pages_changed(*course_ids):
+    page_cache.invalidate(*[f'course:{course_id}' for course_id in set(course_ids) - {None}])
+
+
+# Remember the values a row was loaded with so that saves can apply deltas
+# to the progress table instead of recounting.
+@receiver(post_init, sender=Submission)
+def remember_submission(sender, instance, **kwargs):
+    instance._progress_state = _loaded(instance, 'student_id', 'assignment_id', 'marks')
+
+
+@receiver(post_init, sender=QuizResult)
+def remember_quiz_result(sender, instance, **kwargs):
+    instance._progress_state = _loaded(instance, 'student_id', 'quiz_id', 'score')
+
+
+@receiver(post_init, sender=Assignment)
+@receiver(post_init, sender=Quiz)
+def remember_course(sender, instance, **kwargs):
+    instance._progress_course_id = instance.__dict__.get('course_id')
+
+
+# --- Enrollment ---
+
+@receiver(post_init, sender=Enrollment)
+def remember_student(sender, instance, **kwargs):
+    instance._original_student_id = instance.__dict__.get('student_id')
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, **kwargs):
+    if created:
+        progress.refresh(instance.student_id, instance.course_id)
+    enrollments.forget_membership(*{instance._original_student_id, instance.student_id} - {None})
+    instance._original_student_id = instance.student_id
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    enrollments.forget_membership(instance.student_id)
+
+
+# --- Submission ---
+
+@receiver(post_save, sender=Submission)
+def submission_saved(sender, instance, created, **kwargs):
+    course_id = instance.assignment.course_id
+    if instance._progress_state is None:
+        progress.refresh(instance.student_id, course_id)
+        return
+    student_id, assignment_id, marks = instance._progress_state
+    if created:
+        progress.add_submission(instance.student_id, course_id, marks=_int(instance.marks))
+    elif (student_id, assignment_id) != (instance.student_id, instance.assignment_id):
+        old_course_id = Assignment.objects.values_list('course_id', flat=True).get(pk=assignment_id)
+        progress.refresh(student_id, old_course_id)
+        progress.refresh(instance.student_id, course_id)
+    else:
+        progress.add_marks(instance.student_id, course_id, _int(instance.marks) - _int(marks))
+    instance._progress_state = (instance.student_id, instance.assignment_id, instance.marks)
+
+
+@receiver(post_delete, sender=Submission)
+def submission_deleted(sender, instance, **kwargs):
+    course_id = instance.assignment.course_id
+    if instance._progress_state is None:
+        progress.refresh(instance.student_id, course_id)
+        return
+    student_id, assignment_id, marks = instance._progress_state
+    progress.add_submission(student_id, course_id, count=-1, marks=-_int(marks))
+
+
+# --- QuizResult ---
+
+@receiver(post_save, sender=QuizResult)
+def quiz_result_saved(sender, instance, created, **kwargs):
+    course_id = instance.quiz.course_id
+    if instance._progress_state is None:
+        progress.refresh(instance.student_id, course_id)
+        instance.rank = leaderboards.quizzes.place(instance.quiz_id, instance.pk, instance.score)
+        return
+    student_id, quiz_id, score = instance._progress_state
+    if created:
+        progress.add_quiz_result(instance.student_id, course_id, score=_int(instance.score))
+        instance.rank = leaderboards.quizzes.moved(instance.quiz_id, instance.pk, None, instance.score)
+    elif (student_id, quiz_id) != (instance.student_id, instance.quiz_id):
+        old_course_id = Quiz.objects.values_list('course_id', flat=True).get(pk=quiz_id)
+        progress.refresh(student_id, old_course_id)
+        progress.refresh(instance.student_id, course_id)
+        leaderboards.quizzes.rerank({quiz_id, instance.quiz_id})
+    else:
+        progress.add_marks(instance.student_id, course_id, _int(instance.score) - _int(score))
+        # Also re-places the row when the score is unchanged, in case save()
+        # wrote back a rank that had gone stale since the row was loaded.
+        instance.rank = leaderboards.quizzes.moved(instance.quiz_id, instance.pk, score, instance.score)
+    instance._progress_state = (instance.student_id, instance.quiz_id, instance.score)
+
+
+@receiver(post_delete, sender=QuizResult)
+def quiz_result_deleted(sender, instance, **kwargs):
+    if instance._progress_state is None:
+        progress.refresh(instance.student_id, instance.quiz.course_id)
+        leaderboards.quizzes.rerank([instance.quiz_id])
+        return
+    student_id, quiz_id, score = instance._progress_state
+    progress.add_quiz_result(student_id, instance.quiz.course_id, count=-1, score=-_int(score))
+    leaderboards.quizzes.moved(quiz_id, instance.pk, score, None)
+
+
+@receiver(post_delete, sender=EnrollmentProgress)
+def progress_deleted(sender, instance, **kwargs):
+    # When a whole course goes, its rows are already gone and this matches nothing.
+    leaderboards.courses.moved(instance.course_id, instance.pk, instance.total_marks, None)
+
+
+# --- Assignment & Quiz ---
+
+def _course_changed(instance, created, add):
+    old_course_id = instance._progress_course_id
+    _course_pages_changed(old_course_id, instance.course_id)
+    analytics.invalidate(*{old_course_id, instance.course_id} - {None})
+    if created:
+        add(instance.course_id, 1)
+    elif old_course_id is None or old_course_id != instance.course_id:
+        # Moving an assignment/quiz between courses is rare; just recount both.
+        progress.rebuild(Enrollment.objects.filter(course_id__in=[old_course_id, instance.course_id]))
+    instance._progress_course_id = instance.course_id
+
+
+@receiver(post_save, sender=Assignment)
+def assignment_saved(sender, instance, created, **kwargs):
+    _course_changed(instance, created, progress.add_assignments)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_saved(sender, instance, created, **kwargs):
+    _course_changed(instance, created, progress.add_quizzes)
+
+
+@receiver(post_delete, sender=Assignment)
+def assignment_deleted(sender, instance, **kwargs):
+    course_id = instance._progress_course_id or instance.course_id
+    progress.add_assignments(course_id, -1)
+    _course_pages_changed(course_id)
+    analytics.invalidate(course_id)
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_deleted(sender, instance, **kwargs):
+    course_id = instance._progress_course_id or instance.course_id
+    progress.add_quizzes(course_id, -1)
+    _course_pages_changed(course_id)
+    analytics.invalidate(course_id)
+
+
+# --- Question & Choice (quiz answer key cache) ---
+
+@receiver(post_init, sender=Question)
+def remember_quiz(sender, instance, **kwargs):
+    instance._original_quiz_id = instance.__dict__.get('quiz_id')
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    for quiz_id in {instance._original_quiz_id, instance.quiz_id} - {None}:
+        quizzes.invalidate(quiz_id)
+    instance._original_quiz_id = instance.quiz_id
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    quiz_id = Question.objects.filter(pk=instance.question_id).values_list('quiz_id', flat=True).first()
+    if quiz_id is not None:
+        quizzes.invalidate(quiz_id)
+
+
+# --- Lesson (course outline cache) ---
+
+@receiver(post_init, sender=Lesson)
+def remember_lesson_course(sender, instance, **kwargs):
+    instance._original_course_id = instance.__dict__.get('course_id')
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    for course_id in {instance._original_course_id, instance.course_id} - {None}:
+        outline.invalidate(course_id)
+    _course_pages_changed(instance._original_course_id, instance.course_id)
+    instance._original_course_id = instance.course_id
+
+
+# --- Anonymous page cache (core/page_cache.py) ---
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    page_cache.invalidate('catalog', f'course:{instance.pk}')
+
+
+@receiver(post_init, sender=User)
+def remember_role(sender, instance, **kwargs):
+    instance._original_role = instance.__dict__.get('role')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def mentor_changed(sender, instance, update_fields=None, **kwargs):
+    # Mentor names show on the catalog and on each of their course pages,
+    # and the catalog's mentor filter lists every mentor.
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    if 'mentor' not in (instance.role, instance._original_role):
+        return
+    course_ids = Course.objects.filter(mentor_id=instance.pk).values_list('id', flat=True)
+    page_cache.invalidate('catalog', *[f'course:{course_id}' for course_id in course_ids])
+    instance._original_role = instance.role
+
+
+# --- Course analytics cache (core/analytics.py) ---
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def enrollment_grades_changed(sender, instance, **kwargs):
+    analytics.invalidate(instance.course_id)
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+def submission_grades_changed(sender, instance, **kwargs):
+    analytics.invalidate(instance.assignment.course_id)
+
+
+@receiver(post_save, sender=QuizResult)
+@receiver(post_delete, sender=QuizResult)
+def quiz_result_grades_changed(sender, instance, **kwargs):
+    analytics.invalidate(instance.quiz.course_id)
+
+
+# --- Image variants (core/thumbnails.py) ---
+
+def _file_name(value):
+    # Before the descriptor wraps it, a loaded file field is its name.
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Course)
+def remember_image(sender, instance, **kwargs):
+    field, _ = thumbnails.FIELDS[sender]
+    instance._original_image = _file_name(instance.__dict__.get(field))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Course)
+def image_saved(sender, instance, created, update_fields=None, **kwargs):
+    field, variants = thumbnails.FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    image = getattr(instance, field)
+    if image and (created or image.name != instance._original_image):
+        thumbnails.generate(image, variants)
+    instance._original_image = image.name
+
+
+# runserver picks up an edited template without restarting, so pages and
+# fragments ({% cache %} in base.html) rendered from the old version would
+# outlive the edit. Only the dev server's autoreloader sends this.
+@receiver(file_changed)
+def template_edited(sender, file_path, **kwargs):
+    if file_path.suffix == '.html':
+        caches['pages'].clear()
@@ -0,0 +1,11 @@
+from django import template
+
+from core import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(fieldfile, variant):
+    """{{ course.course_image|thumbnail:"card" }}: URL of a resized copy."""
+    return thumbnails.url(fieldfile, variant)
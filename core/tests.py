@@ -1,3 +1,802 @@
-from django.test import TestCase
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.core.exceptions import BadRequest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import enrollments, leaderboards, media, pagination, progress, quizzes, search
+from .models import (
+    Assignment, Choice, Course, Enrollment, EnrollmentProgress, Lesson, Question, Quiz, QuizResult, Submission,
+    User,
+)
+
+
+# In memory, so tests don't write into the cache directories of settings.py.
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    'pages': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'memberships': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-memberships'},
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-sessions'},
+}
+
+
+# Tables that grow with the number of students. A query that reads one of
+# them front to back (SCAN without an index) gets slower with every
+# enrollment, so the plans below must SEARCH them through an index.
+LARGE_TABLES = {
+    'core_user', 'core_enrollment', 'core_enrollmentprogress', 'core_lesson', 'core_assignment',
+    'core_submission', 'core_quiz', 'core_quizresult', 'django_session',
+}
+
+_ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)"?')
+_SCAN = re.compile(r'^SCAN (\w+)(?! USING (?:COVERING )?INDEX)')
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def table_scans(sql):
+    """Large tables that `sql` reads without an index."""
+    aliases = {alias: table for table, alias in _ALIAS.findall(sql)}
+    scans = []
+    for detail in query_plan(sql):
+        match = _SCAN.match(detail)
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in LARGE_TABLES:
+                scans.append(table)
+    return scans
+
+
+@override_settings(CACHES=TEST_CACHES, PROFILER_ENABLED=False)
+class QueryPlanTests(TestCase):
+    """Every query a page makes must find its rows in the large tables
+    through an index. Plans are taken without ANALYZE statistics, so SQLite
+    plans as if every table were big, which is the case being guarded."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.mentor = User.objects.create(username='mentor', role='mentor')
+        cls.student = User.objects.create(username='student', role='student')
+        others = User.objects.bulk_create(
+            User(username=f'student{i}', role='student') for i in range(5)
+        )
+        cls.course = Course.objects.create(title='Course', description='d', mentor=cls.mentor)
+        cls.lessons = Lesson.objects.bulk_create(
+            Lesson(course=cls.course, title=f'Lesson {i}', content='c', order=i) for i in range(3)
+        )
+        cls.assignment = Assignment.objects.create(
+            course=cls.course, title='Assignment', description='d', due_date=now + timedelta(days=7),
+        )
+        cls.quiz = Quiz.objects.create(course=cls.course, title='Quiz', description='d', total_marks=1)
+        question = Question.objects.create(quiz=cls.quiz, text='Q')
+        Choice.objects.create(question=question, text='A', is_correct=True)
+        for student in [cls.student, *others]:
+            Enrollment.objects.create(student=student, course=cls.course)
+            Submission.objects.create(
+                assignment=cls.assignment, student=student, marks=5, file=f'submissions/{student.pk:064x}.pdf',
+            )
+            QuizResult.objects.create(quiz=cls.quiz, student=student, score=1)
+
+    def assertIndexedPage(self, user, url):
+        if user is not None:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            with self.subTest(url=url, sql=sql):
+                self.assertEqual(table_scans(sql), [], f"full table scan in:\n{sql}\n{query_plan(sql)}")
+
+    def test_catalog(self):
+        self.assertIndexedPage(None, reverse('home'))
+        self.assertIndexedPage(None, reverse('course_list'))
+        self.assertIndexedPage(self.student, reverse('course_detail', args=[self.course.id]))
+
+    def test_student_pages(self):
+        c = self.course.id
+        self.assertIndexedPage(self.student, reverse('student_dashboard'))
+        self.assertIndexedPage(self.student, reverse('dashboard_submissions_more'))
+        self.assertIndexedPage(self.student, reverse('dashboard_quiz_results_more'))
+        self.assertIndexedPage(self.student, reverse('lesson_detail', args=[c, self.lessons[1].id]))
+        self.assertIndexedPage(self.student, reverse('assignment_detail', args=[c, self.assignment.id]))
+        self.assertIndexedPage(self.student, reverse('take_quiz', args=[c, self.quiz.id]))
+        self.assertIndexedPage(self.student, reverse('course_leaderboard', args=[c]))
+        self.assertIndexedPage(self.student, reverse('course_leaderboard_me', args=[c]))
+        self.assertIndexedPage(self.student, reverse('quiz_leaderboard', args=[c, self.quiz.id]))
+        self.assertIndexedPage(self.student, reverse('quiz_leaderboard_me', args=[c, self.quiz.id]))
+
+    def test_mentor_pages(self):
+        c = self.course.id
+        self.assertIndexedPage(self.mentor, reverse('assignment_submissions', args=[c, self.assignment.id]))
+        self.assertIndexedPage(self.mentor, reverse('assignment_submissions_more', args=[c, self.assignment.id]))
+        self.assertIndexedPage(self.mentor, reverse('course_analytics', args=[c]))
+        self.assertIndexedPage(self.mentor, reverse('course_gradebook', args=[c]))
+
+
+class IndexOrderingTests(TestCase):
+    """The hot lists come out of their index already sorted."""
+
+    def assertSortedByIndex(self, queryset):
+        plan = query_plan(str(queryset.query))
+        self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], plan)
+
+    def test_dashboard_history(self):
+        self.assertSortedByIndex(Submission.objects.filter(student_id=1).order_by('-submitted_at', '-id'))
+        self.assertSortedByIndex(QuizResult.objects.filter(student_id=1).order_by('-attempted_at', '-id'))
+
+    def test_grading_list(self):
+        self.assertSortedByIndex(Submission.objects.filter(assignment_id=1).order_by('submitted_at', 'id'))
+
+    def test_course_outline(self):
+        self.assertSortedByIndex(Lesson.objects.filter(course_id=1).order_by('order', 'id'))
+        self.assertSortedByIndex(Assignment.objects.filter(course_id=1).order_by('due_date', 'id'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LeaderboardTests(TestCase):
+    """Ranks kept up to date one write at a time (core/leaderboards.py) must
+    be the ranks a full sort would give, ties included."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        mentor = User.objects.create(username='mentor', role='mentor')
+        cls.course = Course.objects.create(title='Course', description='d', mentor=mentor)
+        cls.students = User.objects.bulk_create(
+            User(username=f'student{i}', role='student') for i in range(5)
+        )
+        for student in cls.students:
+            Enrollment.objects.create(student=student, course=cls.course)
+        cls.assignments = [
+            Assignment.objects.create(
+                course=cls.course, title=f'Assignment {i}', description='d', due_date=now + timedelta(days=7),
+            )
+            for i in range(2)
+        ]
+        cls.quiz = Quiz.objects.create(course=cls.course, title='Quiz', description='d', total_marks=10)
+
+    def submit(self, student, assignment, marks):
+        return Submission.objects.create(
+            assignment=assignment, student=student, marks=marks, file=f'submissions/{student.pk}-{assignment.pk}.pdf',
+        )
+
+    def course_ranks(self):
+        return dict(
+            EnrollmentProgress.objects.filter(course=self.course)
+            .values_list('enrollment__student__username', 'rank')
+        )
+
+    def quiz_ranks(self):
+        return dict(QuizResult.objects.filter(quiz=self.quiz).values_list('student__username', 'rank'))
+
+    def assertMatchesFullSort(self):
+        # rerank() recomputes with RANK() and reports what it had to correct.
+        self.assertEqual(leaderboards.courses.rerank([self.course.id]), 0)
+        self.assertEqual(leaderboards.quizzes.rerank([self.quiz.id]), 0)
+
+    def test_course_ranks(self):
+        s0, s1, s2, s3, s4 = self.students
+        a, b = self.assignments
+        subs = {s: self.submit(s, a, marks) for s, marks in ((s0, 50), (s1, 70), (s2, 70), (s3, 30))}
+        self.assertEqual(self.course_ranks(), {'student0': 3, 'student1': 1, 'student2': 1, 'student3': 4, 'student4': 5})
+        self.assertMatchesFullSort()
+
+        # Up into a tie, and out of one.
+        subs[s3].marks = 50
+        subs[s3].save()
+        self.assertEqual(self.course_ranks(), {'student0': 3, 'student1': 1, 'student2': 1, 'student3': 3, 'student4': 5})
+        self.submit(s2, b, 20)
+        self.assertEqual(self.course_ranks(), {'student0': 3, 'student1': 2, 'student2': 1, 'student3': 3, 'student4': 5})
+        subs[s1].marks = 30
+        subs[s1].save()
+        self.assertEqual(self.course_ranks(), {'student0': 2, 'student1': 4, 'student2': 1, 'student3': 2, 'student4': 5})
+        self.assertMatchesFullSort()
+
+        # Ungraded counts as nothing, and a deleted submission takes its marks with it.
+        subs[s0].marks = None
+        subs[s0].save()
+        subs[s2].delete()
+        self.assertEqual(self.course_ranks(), {'student0': 4, 'student1': 2, 'student2': 3, 'student3': 1, 'student4': 4})
+        self.assertMatchesFullSort()
+
+    def test_quiz_ranks(self):
+        s0, s1, s2, s3, _ = self.students
+        results = {s: QuizResult.objects.create(quiz=self.quiz, student=s, score=score)
+                   for s, score in ((s0, 7), (s1, 9), (s2, 7))}
+        self.assertEqual(self.quiz_ranks(), {'student0': 2, 'student1': 1, 'student2': 2})
+        QuizResult.objects.create(quiz=self.quiz, student=s3, score=9)
+        self.assertEqual(self.quiz_ranks(), {'student0': 3, 'student1': 1, 'student2': 3, 'student3': 1})
+
+        results[s0].score = 10
+        results[s0].save()
+        self.assertEqual(self.quiz_ranks(), {'student0': 1, 'student1': 2, 'student2': 4, 'student3': 2})
+        results[s1].delete()
+        self.assertEqual(self.quiz_ranks(), {'student0': 1, 'student2': 3, 'student3': 2})
+        self.assertMatchesFullSort()
+
+    def test_rebuild_matches_incremental(self):
+        s0, s1, s2, s3, _ = self.students
+        a, b = self.assignments
+        for s, marks in ((s0, 40), (s1, 60), (s2, 60), (s3, None)):
+            self.submit(s, a, marks)
+        self.submit(s0, b, 20)
+        for s, score in ((s1, 5), (s3, 8)):
+            QuizResult.objects.create(quiz=self.quiz, student=s, score=score)
+        fields = [f.attname for f in EnrollmentProgress._meta.concrete_fields]
+        incremental = list(EnrollmentProgress.objects.order_by('pk').values_list(*fields))
+
+        # Rebuilt from nothing, and from stale rows both ways: moving a few
+        # ranks, and re-sorting the course once past INCREMENTAL_RERANK_LIMIT.
+        for limit in (progress.INCREMENTAL_RERANK_LIMIT, 0):
+            with self.subTest(limit=limit), mock.patch.object(progress, 'INCREMENTAL_RERANK_LIMIT', limit):
+                EnrollmentProgress.objects.update(total_marks=0, submitted_assignments=0, attempted_quizzes=0, rank=1)
+                progress.rebuild()
+                self.assertEqual(list(EnrollmentProgress.objects.order_by('pk').values_list(*fields)), incremental)
+        EnrollmentProgress.objects.all().delete()
+        progress.rebuild()
+        rebuilt = list(EnrollmentProgress.objects.order_by('pk').values_list(*fields[1:]))
+        self.assertEqual(rebuilt, [row[1:] for row in incremental])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PaginationTests(TestCase):
+    """Walking a keyset-paginated list (core/pagination.py) cursor by cursor
+    yields every row exactly once, however many share the leading key."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = User.objects.create(username='mentor', role='mentor', first_name='Ada', last_name='Lovelace')
+        cls.courses = Course.objects.bulk_create(
+            Course(title=['Django', 'Python', 'SQL'][i % 3], description='d', mentor=cls.mentor) for i in range(25)
+        )
+
+    def walk(self, queryset, ordering, per_page):
+        seen, cursor = [], None
+        # A cursor that doesn't move forward would otherwise loop for ever.
+        for _ in range(queryset.count() + 1):
+            page = pagination.paginate(queryset, ordering, cursor, per_page)
+            self.assertLessEqual(len(page), per_page)
+            seen += [item.pk for item in page]
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+        self.fail(f"still paging after {len(seen)} rows")
+
+    def test_ties(self):
+        for ordering in (('title', 'id'), ('-title', 'id'), ('title', '-id')):
+            for per_page in (1, 4, 8, 25):
+                with self.subTest(ordering=ordering, per_page=per_page):
+                    expected = list(Course.objects.order_by(*ordering).values_list('pk', flat=True))
+                    self.assertEqual(self.walk(Course.objects.all(), ordering, per_page), expected)
+
+    def test_timestamp_ties(self):
+        # Cursors carry datetimes as ISO strings; equal ones must still compare equal.
+        student = User.objects.create(username='student', role='student')
+        assignment = Assignment.objects.create(
+            course=self.courses[0], title='Assignment', description='d', due_date=timezone.now(),
+        )
+        Submission.objects.bulk_create(
+            Submission(assignment=assignment, student=student, file=f'submissions/{i}.pdf') for i in range(9)
+        )
+        Submission.objects.update(submitted_at=timezone.now())
+        ordering = ('-submitted_at', '-id')
+        expected = list(Submission.objects.order_by(*ordering).values_list('pk', flat=True))
+        self.assertEqual(self.walk(Submission.objects.all(), ordering, 2), expected)
+
+    def test_tampered_cursor(self):
+        cursor = pagination.paginate(Course.objects.all(), ('title', 'id'), per_page=4).next_cursor
+        forged = signing.dumps(['Django'], salt='core.pagination', compress=True)
+        for bad in (cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'), 'garbage', forged):
+            with self.subTest(cursor=bad), self.assertRaises(BadRequest):
+                pagination.paginate(Course.objects.all(), ('title', 'id'), bad, 4)
+        response = self.client.get(reverse('course_list_more'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_mentor_filter(self):
+        for url in (reverse('course_list'), reverse('course_list_more')):
+            for value in ('abc', '-1', '99999999999999999999', '²'):
+                with self.subTest(url=url, mentor=value):
+                    response = self.client.get(url, {'mentor': value})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.context['courses']), 12)
+            response = self.client.get(url, {'mentor': str(self.mentor.pk + 1)})
+            self.assertEqual(len(response.context['courses']), 0)
+
+    def test_search_pages(self):
+        # Identical documents score the same, so paging leans on the id tiebreak.
+        response = self.client.get(reverse('course_list'), {'q': 'pyth'})
+        seen = [course.pk for course in response.context['courses']]
+        next_url = response.context['next_page_url']
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [course.pk for course in response.context['courses']]
+            next_url = response['X-Next-Page']
+        expected = [course.pk for course in self.courses if course.title == 'Python']
+        self.assertEqual(sorted(seen), expected)
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchTests(TestCase):
+    """The FTS5 index follows course and mentor edits (its triggers), and
+    ranks title hits above description hits."""
+
+    def setUp(self):
+        self.mentor = User.objects.create(username='mentor', role='mentor', first_name='Ada', last_name='Lovelace')
+        self.web = Course.objects.create(title='Web development', description='Build sites with Django.', mentor=self.mentor)
+        self.django = Course.objects.create(title='Django in depth', description='Models and views.', mentor=self.mentor)
+
+    def titles(self, text):
+        return list(search.search_courses(Course.objects.all(), text).values_list('title', flat=True))
+
+    def test_prefix_and_rank(self):
+        self.assertEqual(self.titles('djan'), ['Django in depth', 'Web development'])
+        self.assertEqual(self.titles('web dev'), ['Web development'])
+        self.assertCountEqual(self.titles('Lovelace'), ['Web development', 'Django in depth'])
+        # FTS5 syntax in the input is taken as words, not operators.
+        self.assertEqual(self.titles('django -web'), ['Web development'])
+        self.assertEqual(self.titles('"*'), [])
+
+    def test_index_follows_edits(self):
+        self.web.title = 'Flask basics'
+        self.web.save()
+        self.assertEqual(self.titles('flask'), ['Flask basics'])
+        User.objects.filter(pk=self.mentor.pk).update(last_name='Byron')
+        self.assertEqual(len(self.titles('byron')), 2)
+        self.assertEqual(self.titles('lovelace'), [])
+        self.django.delete()
+        self.assertEqual(self.titles('depth'), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BulkGradingTests(TestCase):
+    """The grading page's Save buttons and marks CSV (core/grading.py):
+    all-or-nothing, limited to the mentor's own assignment, and the course
+    leaderboard follows the new marks."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = User.objects.create(username='mentor', role='mentor')
+        other_mentor = User.objects.create(username='other', role='mentor')
+        cls.students = User.objects.bulk_create(User(username=f'student{i}', role='student') for i in range(3))
+        cls.course = Course.objects.create(title='Course', description='d', mentor=cls.mentor)
+        other_course = Course.objects.create(title='Other', description='d', mentor=other_mentor)
+        due = timezone.now() + timedelta(days=7)
+        cls.assignment = Assignment.objects.create(course=cls.course, title='A', description='d', due_date=due)
+        other_assignment = Assignment.objects.create(course=other_course, title='B', description='d', due_date=due)
+        cls.subs, cls.other_subs = [], []
+        for student in cls.students:
+            for course, assignment, subs in ((cls.course, cls.assignment, cls.subs),
+                                             (other_course, other_assignment, cls.other_subs)):
+                Enrollment.objects.create(student=student, course=course)
+                subs.append(Submission.objects.create(
+                    assignment=assignment, student=student, file=f'submissions/{student.pk}-{assignment.pk}.pdf',
+                ))
+        cls.url = reverse('assignment_submissions', args=[cls.course.id, cls.assignment.id])
+
+    def setUp(self):
+        self.client.force_login(self.mentor)
+
+    def marks(self, subs):
+        return [sub.marks for sub in Submission.objects.filter(pk__in=[s.pk for s in subs]).order_by('pk')]
+
+    def course_ranks(self):
+        return list(
+            EnrollmentProgress.objects.filter(course=self.course)
+            .order_by('enrollment__student_id').values_list('total_marks', 'rank')
+        )
+
+    def post(self, data):
+        """Post to the grading page; returns the messages it shows after."""
+        response = self.client.post(self.url, data, follow=True)
+        self.assertEqual(response.redirect_chain, [(self.url, 302)])
+        return [str(message) for message in response.context['messages']]
+
+    def upload(self, text):
+        return self.post({'marks_file': SimpleUploadedFile('marks.csv', text.encode())})
+
+    def assertUngraded(self):
+        self.assertEqual(self.marks(self.subs), [None] * 3)
+        self.assertEqual(self.marks(self.other_subs), [None] * 3)
+        self.assertEqual(self.course_ranks(), [(0, 1)] * 3)
+
+    def test_post(self):
+        a, b, c = self.subs
+        messages = self.post({f'marks_{a.pk}': '80', f'marks_{b.pk}': '95', f'marks_{c.pk}': ''})
+        self.assertEqual(messages, ['Marks updated for 2 submissions!'])
+        self.assertEqual(self.marks(self.subs), [80, 95, None])
+        self.assertEqual(self.course_ranks(), [(80, 2), (95, 1), (0, 3)])
+
+        # One row's Save button takes just that row, and ties share a rank.
+        self.post({'submission_id': str(b.pk), f'marks_{a.pk}': '10', f'marks_{b.pk}': '80'})
+        self.assertEqual(self.marks(self.subs), [80, 80, None])
+        self.assertEqual(self.course_ranks(), [(80, 1), (80, 1), (0, 3)])
+        self.assertEqual(leaderboards.courses.rerank([self.course.id]), 0)
+
+    def test_csv(self):
+        a, b, c = self.subs
+        self.upload("student,marks\nstudent0,70\nstudent1,\nstudent2,100\n")
+        self.assertEqual(self.marks(self.subs), [70, None, 100])
+        self.upload(f"submission,marks\n{b.pk},100\n{c.pk},60\n")
+        self.assertEqual(self.marks(self.subs), [70, 100, 60])
+        self.assertEqual(self.course_ranks(), [(70, 2), (100, 1), (60, 3)])
+        self.assertEqual(leaderboards.courses.rerank([self.course.id]), 0)
+
+    def test_out_of_range(self):
+        a, b, _ = self.subs
+        for value in ('101', '-1', '9.5', 'abc'):
+            with self.subTest(value=value):
+                # The valid row in the same request isn't written either.
+                self.assertEqual(len(self.post({f'marks_{a.pk}': '50', f'marks_{b.pk}': value})), 1)
+                self.assertEqual(len(self.upload(f"submission,marks\n{a.pk},50\n{b.pk},{value}\n")), 1)
+                self.assertUngraded()
+
+    def test_other_course(self):
+        a = self.subs[0]
+        other = self.other_subs[0]
+        self.assertEqual(
+            self.post({f'marks_{a.pk}': '50', f'marks_{other.pk}': '50'}),
+            [f'Not submissions of this assignment: {other.pk}.'],
+        )
+        self.assertEqual(len(self.upload(f"submission,marks\n{a.pk},50\n{other.pk},50\n")), 1)
+        self.assertUngraded()
+
+        # Nor may another course's mentor grade this one.
+        self.client.force_login(self.other_subs[0].assignment.course.mentor)
+        self.client.post(self.url, {f'marks_{a.pk}': '50'})
+        self.assertUngraded()
+
+
+class TempMediaMixin:
+    """Runs the class with MEDIA_ROOT in a temporary directory, emptied
+    before each test."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    def setUp(self):
+        super().setUp()
+        # Each test starts with no files.
+        shutil.rmtree(self.media_root)
+        os.mkdir(self.media_root)
+
+    def write_media(self, name, data):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+
+
+@override_settings(CACHES=TEST_CACHES, MEDIA_SENDFILE=None)
+class MediaTests(TempMediaMixin, TestCase):
+    """Who may fetch what under /media/ (core/media.py), and the conditional
+    and partial responses."""
+
+    DATA = b'0123456789abcdef'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = User.objects.create(username='mentor', role='mentor')
+        cls.student = User.objects.create(username='student', role='student')
+        cls.other = User.objects.create(username='other', role='student')
+        course = Course.objects.create(title='Course', description='d', mentor=cls.mentor)
+        assignment = Assignment.objects.create(
+            course=course, title='A', description='d', due_date=timezone.now() + timedelta(days=7),
+        )
+        digest = hashlib.sha256(cls.DATA).hexdigest()
+        cls.name = f'submissions/{digest[:2]}/{digest[2:4]}/{digest}.txt'
+        Submission.objects.create(assignment=assignment, student=cls.student, file=cls.name, original_name='notes.txt')
+
+    def setUp(self):
+        super().setUp()
+        self.write_media(self.name, self.DATA)
+        self.write_media('profile_photos/me.png', b'png')
+        self.write_media('course_images/c.png', b'png')
+
+    def get(self, name, user=None, **headers):
+        self.client.logout()
+        if user is not None:
+            self.client.force_login(user)
+        return self.client.get(reverse('media', args=[name]), headers=headers)
+
+    def test_submission_access(self):
+        for user, status in ((self.student, 200), (self.mentor, 200), (self.other, 403), (None, 403)):
+            with self.subTest(user=user):
+                self.assertEqual(self.get(self.name, user).status_code, status)
+        response = self.get(self.name, self.student)
+        self.assertEqual(b''.join(response.streaming_content), self.DATA)
+        # Not a type a browser may show inline, and under the name it was uploaded as.
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="notes.txt"')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_profile_photos_need_login(self):
+        self.assertEqual(self.get('profile_photos/me.png').status_code, 403)
+        self.assertEqual(self.get('profile_photos/me.png', self.other).status_code, 200)
+        response = self.get('course_images/c.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_traversal(self):
+        for name in ('course_images/../' + self.name, '/' + self.name, 'course_images/./c.png', 'other/x.png'):
+            with self.subTest(name=name), self.assertRaises(Http404):
+                media.check_access(self.student, name)
+        self.assertEqual(self.get('course_images/../' + self.name).status_code, 404)
+        self.assertEqual(self.get('course_images/missing.png').status_code, 404)
+
+    def test_not_modified(self):
+        response = self.get(self.name, self.student)
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{hashlib.sha256(self.DATA).hexdigest()}"')
+        self.assertEqual(self.get(self.name, self.student, if_none_match=etag).status_code, 304)
+        self.assertEqual(self.get(self.name, self.student, if_none_match='"stale"').status_code, 200)
+        # Access is checked before the cache validators.
+        self.assertEqual(self.get(self.name, self.other, if_none_match=etag).status_code, 403)
+
+    def test_range(self):
+        response = self.get(self.name, self.student, range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/16')
+        response = self.get(self.name, self.student, range='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'def')
+
+        response = self.get(self.name, self.student, range='bytes=16-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */16')
+        # A Range for an older version of the file is answered with all of it.
+        response = self.get(self.name, self.student, range='bytes=2-5', if_range='"old"')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SubmissionUploadTests(TempMediaMixin, TestCase):
+    """Submission files go through the hashing upload handlers into
+    content-addressed storage (core/uploads.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        mentor = User.objects.create(username='mentor', role='mentor')
+        cls.students = User.objects.bulk_create(User(username=f'student{i}', role='student') for i in range(2))
+        cls.course = Course.objects.create(title='Course', description='d', mentor=mentor)
+        cls.assignment = Assignment.objects.create(
+            course=cls.course, title='A', description='d', due_date=timezone.now() + timedelta(days=7),
+        )
+        for student in cls.students:
+            Enrollment.objects.create(student=student, course=cls.course)
+        cls.url = reverse('assignment_detail', args=[cls.course.id, cls.assignment.id])
+
+    def upload(self, student, filename, data):
+        self.client.force_login(student)
+        return self.client.post(self.url, {'file': SimpleUploadedFile(filename, data)})
+
+    def stored_files(self):
+        return [
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        ]
+
+    def test_identical_uploads_share_a_file(self):
+        data = b'%PDF-1.4 the same essay'
+        self.assertEqual(self.upload(self.students[0], 'essay.pdf', data).status_code, 302)
+        self.assertEqual(self.upload(self.students[1], 'my copy.pdf', data).status_code, 302)
+
+        subs = Submission.objects.filter(assignment=self.assignment).order_by('student_id')
+        digest = hashlib.sha256(data).hexdigest()
+        name = f'submissions/{digest[:2]}/{digest[2:4]}/{digest}.pdf'
+        self.assertEqual([(sub.file.name, sub.original_name) for sub in subs],
+                         [(name, 'essay.pdf'), (name, 'my copy.pdf')])
+        self.assertEqual(self.stored_files(), [name])
+        with open(os.path.join(self.media_root, name), 'rb') as fh:
+            self.assertEqual(fh.read(), data)
+
+    @override_settings(MAX_UPLOAD_SIZE=10)
+    def test_too_large(self):
+        response = self.upload(self.students[0], 'big.pdf', b'x' * 11)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['form'].errors['file'], ['big.pdf is larger than the 10\xa0bytes upload limit.'],
+        )
+        self.assertFalse(Submission.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+        self.assertEqual(self.upload(self.students[0], 'small.pdf', b'x' * 10).status_code, 302)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QuizAnswerKeyTests(TestCase):
+    """take_quiz grades against a cached answer key and serves the questions
+    from a {% cache %} fragment; editing a question or choice must retire
+    both (core/quizzes.py, core/signals.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        mentor = User.objects.create(username='mentor', role='mentor')
+        cls.students = User.objects.bulk_create(User(username=f'student{i}', role='student') for i in range(2))
+        cls.course = Course.objects.create(title='Course', description='d', mentor=mentor)
+        cls.quiz = Quiz.objects.create(course=cls.course, title='Quiz', description='d', total_marks=2)
+        cls.capital = Question.objects.create(quiz=cls.quiz, text='Capital of France?', order=1)
+        cls.paris = Choice.objects.create(question=cls.capital, text='Paris', is_correct=True)
+        cls.nice = Choice.objects.create(question=cls.capital, text='Nice')
+        cls.sum = Question.objects.create(quiz=cls.quiz, text='1 + 1?', order=2)
+        cls.two = Choice.objects.create(question=cls.sum, text='Two', is_correct=True)
+        for student in cls.students:
+            Enrollment.objects.create(student=student, course=cls.course)
+        cls.url = reverse('take_quiz', args=[cls.course.id, cls.quiz.id])
+
+    def setUp(self):
+        # The keys live in the process and the cache, not in the rolled-back database.
+        quizzes.invalidate(self.quiz.id)
+
+    def take(self, student, answers):
+        self.client.force_login(student)
+        response = self.client.post(self.url, {f'question_{q.pk}': c.pk for q, c in answers})
+        return response.context['result'].score
+
+    def test_edits_invalidate_key_and_fragment(self):
+        self.client.force_login(self.students[0])
+        self.assertContains(self.client.get(self.url), 'Nice')
+        with self.assertNumQueries(1):
+            quizzes.answer_key(self.quiz.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(quizzes.answer_key(self.quiz.id), {
+                self.capital.pk: {self.paris.pk}, self.sum.pk: {self.two.pk},
+            })
+        self.assertEqual(self.take(self.students[0], [(self.capital, self.paris), (self.sum, self.two)]), 2)
+
+        version = quizzes.version(self.quiz.id)
+        self.paris.is_correct = False
+        self.paris.save()
+        self.nice.is_correct = True
+        self.nice.text = 'Lyon'
+        self.nice.save()
+        self.assertNotEqual(quizzes.version(self.quiz.id), version)
+        self.assertEqual(quizzes.answer_key(self.quiz.id)[self.capital.pk], {self.nice.pk})
+        self.assertEqual(self.take(self.students[1], [(self.capital, self.paris), (self.sum, self.two)]), 1)
+
+        # The cached question list shows the edited choice.
+        QuizResult.objects.filter(student=self.students[1]).delete()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Lyon')
+        self.assertNotContains(response, 'Nice')
+
+        # A new question is in both.
+        extra = Question.objects.create(quiz=self.quiz, text='Largest planet?', order=3)
+        jupiter = Choice.objects.create(question=extra, text='Jupiter', is_correct=True)
+        self.assertEqual(quizzes.answer_key(self.quiz.id)[extra.pk], {jupiter.pk})
+        self.assertContains(self.client.get(self.url), 'Jupiter')
+
+
+@override_settings(CACHES={
+    **TEST_CACHES, 'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-pages'},
+})
+class PageCacheTests(TestCase):
+    """Anonymous catalog and course pages come from the page cache until
+    something they show changes (core/page_cache.py, core/signals.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.mentor = User.objects.create(username='mentor', role='mentor', first_name='Ada')
+        cls.course = Course.objects.create(title='Course', description='d', mentor=cls.mentor)
+        cls.lesson = Lesson.objects.create(course=cls.course, title='Intro', content='c', order=1)
+
+    def setUp(self):
+        caches['pages'].clear()
+        caches['default'].clear()
+
+    def assertCached(self, url, text):
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, text)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, text)
+
+    def test_catalog(self):
+        url = reverse('course_list')
+        self.assertCached(url, 'Course')
+        self.course.title = 'Renamed course'
+        self.course.save()
+        self.assertCached(url, 'Renamed course')
+
+        # The mentor's name is on every card.
+        self.mentor.first_name = 'Grace'
+        self.mentor.save()
+        self.assertCached(url, 'Grace')
+        # Logging in isn't a change anyone else sees.
+        self.client.force_login(self.mentor)
+        self.client.logout()
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'hit')
+
+    def test_course_page(self):
+        url = reverse('course_detail', args=[self.course.id])
+        self.assertCached(url, 'Intro')
+        self.lesson.title = 'Getting started'
+        self.lesson.save()
+        self.assertCached(url, 'Getting started')
+        self.mentor.username = 'ada'
+        self.mentor.save()
+        self.assertCached(url, 'ada')
+
+    def test_signed_in_not_cached(self):
+        self.client.force_login(User.objects.create(username='student', role='student'))
+        for url in (reverse('course_list'), reverse('course_detail', args=[self.course.id])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Page-Cache', response)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MembershipCacheTests(TestCase):
+    """The cached enrollment ids (core/enrollments.py) are dropped whenever
+    the student's enrollments change, so access follows on the next request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        mentor = User.objects.create(username='mentor', role='mentor')
+        cls.student = User.objects.create(username='student', role='student')
+        cls.course = Course.objects.create(title='Course', description='d', mentor=mentor)
+        cls.lesson = Lesson.objects.create(course=cls.course, title='Intro', content='c', order=1)
+        cls.url = reverse('lesson_detail', args=[cls.course.id, cls.lesson.id])
+
+    def setUp(self):
+        caches['memberships'].clear()
+        self.client.force_login(self.student)
+
+    def assertAccess(self, allowed):
+        response = self.client.get(self.url)
+        if allowed:
+            self.assertEqual(response.status_code, 200)
+        else:
+            self.assertRedirects(response, reverse('course_detail', args=[self.course.id]),
+                                 fetch_redirect_response=False)
+
+    def test_enroll_and_unenroll(self):
+        # Each check first caches the current membership.
+        self.assertAccess(False)
+        self.client.post(reverse('enroll_course', args=[self.course.id]))
+        self.assertAccess(True)
+        Enrollment.objects.filter(student=self.student).delete()
+        self.assertAccess(False)
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.assertAccess(True)
+
+    def test_bulk_enroll(self):
+        self.assertAccess(False)
+        result = enrollments.bulk_enroll([('student', None)], courses=[self.course])
+        self.assertEqual(result.created, 1)
+        self.assertAccess(True)
+
+    def test_moved_enrollment(self):
+        other = User.objects.create(username='other', role='student')
+        enrollment = Enrollment.objects.create(student=other, course=self.course)
+        self.assertAccess(False)
+        enrollment.student = self.student
+        enrollment.save()
+        self.assertAccess(True)
@@ -0,0 +1,98 @@
+import hashlib
+import io
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Course, User
+
+
+# Resized WebP copies of uploaded images, for pages that show them far
+# smaller than they were uploaded (a 40px navbar avatar, a 180px course
+# card). Each variant is cropped to fill its box, the way the templates'
+# `object-fit: cover` would, at twice the CSS size for high-DPI screens.
+VARIANTS = {
+    'avatar': (160, 160),
+    'profile': (320, 320),
+    'card': (720, 400),
+}
+WEBP_QUALITY = 80
+# How long url() remembers an image it couldn't decode rather than trying
+# again on every page that shows it. A new upload gets a new name, so this
+# only delays a fix made to the file in place (or a retry after e.g. a full
+# disk); generate_thumbnails retries regardless.
+FAILURE_TIMEOUT = 60 * 60 * 24
+
+# The variants each image field is shown at.
+FIELDS = {
+    User: ('profile_photo', ('avatar', 'profile')),
+    Course: ('course_image', ('card',)),
+}
+
+
+def variant_name(name, variant):
+    """profile_photos/me.jpeg -> thumbs/profile_photos/me.jpeg.avatar.webp"""
+    return posixpath.join('thumbs', f"{name}.{variant}.webp")
+
+
+def _failure_key(name):
+    return f"thumbs:failed:{hashlib.sha256(name.encode()).hexdigest()}"
+
+
+def _crop_box(source, target):
+    # The centred region of `source` with the aspect ratio of `target`.
+    width, height = source
+    scale = min(width / target[0], height / target[1])
+    crop_w, crop_h = target[0] * scale, target[1] * scale
+    left, top = (width - crop_w) / 2, (height - crop_h) / 2
+    return (left, top, left + crop_w, top + crop_h)
+
+
+def _render(fh, size):
+    with Image.open(fh) as image:
+        # Let JPEG decode at a reduced scale instead of full resolution.
+        image.draft('RGB', (size[0] * 2, size[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        image = image.resize(size, Image.Resampling.LANCZOS, box=_crop_box(image.size, size), reducing_gap=3.0)
+    out = io.BytesIO()
+    image.save(out, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+def generate(fieldfile, variants=VARIANTS):
+    """(Re)write the given variants of an image; returns the names written.
+
+    An unreadable image gets no variants, and url() keeps serving the
+    original without trying again for FAILURE_TIMEOUT.
+    """
+    storage = fieldfile.storage
+    written = []
+    for variant in variants:
+        try:
+            with storage.open(fieldfile.name, 'rb') as fh:
+                data = _render(fh, VARIANTS[variant])
+        except (OSError, ValueError, Image.DecompressionBombError):
+            cache.set(_failure_key(fieldfile.name), True, timeout=FAILURE_TIMEOUT)
+            break
+        name = variant_name(fieldfile.name, variant)
+        storage.delete(name)
+        written.append(storage.save(name, ContentFile(data)))
+    return written
+
+
+def url(fieldfile, variant):
+    """URL of a variant of `fieldfile`, made on first use for images that
+    were uploaded before variants existed; the original's URL if it can't
+    be made."""
+    if not fieldfile:
+        return ''
+    name = variant_name(fieldfile.name, variant)
+    storage = fieldfile.storage
+    if storage.exists(name):
+        return storage.url(name)
+    if not cache.get(_failure_key(fieldfile.name)) and generate(fieldfile, [variant]):
+        return storage.url(name)
+    return fieldfile.url
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler, SkipFile, TemporaryFileUploadHandler,
+)
+from django.template.defaultfilters import filesizeformat
+from django.utils.deconstruct import deconstructible
+
+
+# --- Upload handlers ---
+#
+# Listed in FILE_UPLOAD_HANDLERS in place of Django's own two. Each chunk is
+# hashed as it streams past, so the finished file arrives with its sha256
+# and nothing has to read it again, and a file is dropped as soon as it
+# grows past MAX_UPLOAD_SIZE instead of being buffered to the end.
+
+class _HashingMixin:
+    def new_file(self, *args, **kwargs):
+        # Before super(): the memory handler ends new_file() by raising
+        # StopFutureHandlers when it takes the file.
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.MAX_UPLOAD_SIZE:
+            rejected = getattr(self.request, 'rejected_uploads', {})
+            rejected[self.field_name] = self.file_name
+            self.request.rejected_uploads = rejected
+            raise SkipFile
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def upload_errors(request):
+    """{field name: message} for files the handlers dropped as too large."""
+    limit = filesizeformat(settings.MAX_UPLOAD_SIZE)
+    return {
+        field: f"{name} is larger than the {limit} upload limit."
+        for field, name in getattr(request, 'rejected_uploads', {}).items()
+    }
+
+
+# --- Content-addressed storage ---
+
+def content_hash(file):
+    """sha256 of an uploaded file; free if an upload handler above saw it."""
+    digest = getattr(file, 'sha256', None)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        for chunk in file.chunks():
+            sha256.update(chunk)
+        file.seek(0)
+        digest = file.sha256 = sha256.hexdigest()
+    return digest
+
+
+def hashed_name(prefix, file, filename):
+    # Two levels of two hex digits: 65,536 directories before any of them
+    # holds more than a handful of files.
+    digest = content_hash(file)
+    ext = os.path.splitext(filename)[1].lower()
+    return posixpath.join(prefix, digest[:2], digest[2:4], digest + ext)
+
+
+def submission_upload_to(instance, filename):
+    return hashed_name('submissions', instance.file.file, filename)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """A name is the hash of its content, so an existing name already holds
+    the bytes being saved: keep it rather than writing a renamed copy."""
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            return name
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temp file and rename, so nobody sees a half-written file
+        # and two concurrent uploads of the same content both just succeed.
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    fh.write(chunk)
+            os.chmod(tmp, self.file_permissions_mode or 0o644)
+            os.replace(tmp, full_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return name
@@ -3,60 +3,119 @@ from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q 
-from django.utils import timezone
+from django.core.exceptions import BadRequest, PermissionDenied, ValidationError
+from django.db import transaction
+from django.template.defaultfilters import pluralize
+from django.urls import reverse
 
 # PDF Generation Imports
-from django.template.loader import get_template
-from django.http import HttpResponse
-from weasyprint import HTML, CSS 
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_safe
+from asgiref.sync import sync_to_async
 from django.conf import settings 
 
+from . import (
+    analytics, certificates, concurrency, enrollments, gradebook, grading, leaderboards, media, outline,
+    page_cache, pagination, progress, quizzes, search, uploads,
+)
 
-from .models import Course, Enrollment, Lesson, Assignment, Submission, Quiz, QuizResult, Question, Choice, User
 
+from .models import Course, Enrollment, EnrollmentProgress, Lesson, Assignment, Submission, Quiz, QuizResult, Question, Choice, User
+
+from .db_router import replica_reads
 from .forms import StudentRegistrationForm, StudentProfileUpdateForm, AssignmentSubmissionForm 
 
+def _catalog_scope(request, *args, **kwargs):
+    return ['catalog']
+
+def _course_scope(request, course_id, *args, **kwargs):
+    return [f'course:{course_id}']
+
 # 1. Home Page View
+@page_cache.anonymous_page(_catalog_scope)
+@replica_reads
 def home(request):
-    courses = Course.objects.all()
+    # Only three courses are featured; don't load the whole catalog.
+    courses = Course.objects.select_related('mentor')[:3]
     return render(request, 'home.html', {'courses': courses})
 
 # 2. Course List View 
-def course_list(request):
-    courses = Course.objects.all()
+COURSES_PER_PAGE = 12
+
+def _id_param(value):
+    # An id from the query string. Anything else, as in a hand-edited URL,
+    # is ignored rather than left for the database to fail on.
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if 0 < value < 2 ** 63 else None
+
+def _catalog_queryset(request):
+    courses = Course.objects.select_related('mentor')
+    ordering = ('id',)
     
     # --- Search Logic ---
     search_query = request.GET.get('q')
     if search_query:
-        courses = courses.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(mentor__first_name__icontains=search_query) |
-            Q(mentor__last_name__icontains=search_query)
-        ).distinct()
+        courses = search.search_courses(courses, search_query)
+        ordering = ('search_index__rank', 'id')
 
     # --- Filter Logic (Filter by Mentor) ---
-    mentor_id = request.GET.get('mentor')
+    mentor_id = _id_param(request.GET.get('mentor'))
     if mentor_id:
         courses = courses.filter(mentor_id=mentor_id)
+        mentor_id = str(mentor_id)  # compared with the <option> values
 
-    
-    enrolled_courses_ids = []
-    if request.user.is_authenticated:
-        enrolled_courses_ids = Enrollment.objects.filter(student=request.user).values_list('course__id', flat=True)
-    
+    return courses, ordering, search_query, mentor_id
+
+def _next_page_url(request, page, url_name, **kwargs):
+    # Keep the current filters (q, mentor, ...) and swap in the new cursor.
+    if not page.has_next:
+        return ''
+    params = request.GET.copy()
+    params['cursor'] = page.next_cursor
+    return f"{reverse(url_name, kwargs=kwargs)}?{params.urlencode()}"
+
+def _fragment(request, template_name, context, next_url):
+    response = render(request, template_name, context)
+    response['X-Next-Page'] = next_url
+    return response
+
+@page_cache.anonymous_page(_catalog_scope)
+@replica_reads
+def course_list(request):
+    courses, ordering, search_query, mentor_id = _catalog_queryset(request)
+    page = pagination.paginate(courses, ordering, per_page=COURSES_PER_PAGE)
+
+    result_count = None
+    if search_query or mentor_id:
+        result_count = courses.count()
     
     mentors = User.objects.filter(role='mentor')
         
     return render(request, 'course_list.html', {
-        'courses': courses,
-        'enrolled_courses_ids': enrolled_courses_ids,
+        'courses': page,
+        'next_page_url': _next_page_url(request, page, 'course_list_more'),
+        'result_count': result_count,
+        'enrolled_courses_ids': enrollments.enrolled_course_ids(request),
         'mentors': mentors,
         'search_query': search_query,
         'selected_mentor': mentor_id
     })
 
+# 2.1 Course List "Load More" Fragment
+@replica_reads
+def course_list_more(request):
+    courses, ordering, search_query, mentor_id = _catalog_queryset(request)
+    page = pagination.paginate(courses, ordering, request.GET.get('cursor'), COURSES_PER_PAGE)
+    return _fragment(request, 'partials/course_cards.html', {
+        'courses': page,
+        'enrolled_courses_ids': enrollments.enrolled_course_ids(request),
+    }, _next_page_url(request, page, 'course_list_more'))
+
 # 3. Student Registration View
 def student_register(request):
     if request.method == 'POST':
@@ -108,6 +167,8 @@ def student_logout(request):
 def student_profile(request):
     if request.method == 'POST':
         form = StudentProfileUpdateForm(request.POST, request.FILES, instance=request.user)
+        for field, error in uploads.upload_errors(request).items():
+            form.add_error(field, error)
         if form.is_valid():
             form.save()
             messages.success(request, 'Your profile has been updated successfully!')
@@ -118,15 +179,15 @@ def student_profile(request):
     return render(request, 'student_profile.html', {'form': form})
 
 # 7. Course Detail View 
+@page_cache.anonymous_page(_course_scope)
+@replica_reads
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    
-    is_enrolled = False
-    if request.user.is_authenticated:
-        is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
+    course = get_object_or_404(Course.objects.select_related('mentor'), id=course_id)
     
-    lessons = course.lessons.all() 
-    assignments = course.assignments.all()
+    is_enrolled = enrollments.is_enrolled(request, course.id)
+
+    lessons = outline.get(course.id)
+    assignments = course.assignments.order_by('due_date', 'id')
     quizzes = course.quizzes.all()
 
     return render(request, 'course_detail.html', {
@@ -146,10 +207,9 @@ def enroll_course(request, course_id):
         messages.error(request, "Only students can enroll in a course.")
         return redirect('course_detail', course_id=course_id)
 
-    already_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    
-    if not already_enrolled:
-        Enrollment.objects.create(student=request.user, course=course)
+    _, created = Enrollment.objects.get_or_create(student=request.user, course=course)
+
+    if created:
         messages.success(request, f"Successfully enrolled in {course.title}!")
     else:
         messages.info(request, "You are already enrolled in this course.")
@@ -157,36 +217,83 @@ def enroll_course(request, course_id):
     return redirect('course_detail', course_id=course.id)
 
 # 9. Student Dashboard View 
-@login_required
-def student_dashboard(request):
-    enrollments = Enrollment.objects.filter(student=request.user)
-    submissions = Submission.objects.filter(student=request.user).order_by('-submitted_at')
-    quiz_results = QuizResult.objects.filter(student=request.user).order_by('-attempted_at')
-    
-    context = {
+HISTORY_PER_PAGE = 20
+SUBMISSION_ORDERING = ('-submitted_at', '-id')
+QUIZ_RESULT_ORDERING = ('-attempted_at', '-id')
+
+def _submission_history(user):
+    return Submission.objects.filter(student=user).select_related('assignment__course')
+
+def _quiz_history(user):
+    return QuizResult.objects.filter(student=user).select_related('quiz__course')
+
+def _dashboard_enrollments(user):
+    enrollments = list(
+        Enrollment.objects.filter(student=user)
+        .select_related('course__mentor', 'progress')
+    )
+    # Stat cards come from the precomputed progress rows, not COUNT queries.
+    rows = [progress.of(enrollment) for enrollment in enrollments]
+    stats = {
+        'courses': len(enrollments),
+        'submissions': sum(row.submitted_assignments for row in rows),
+        'quizzes': sum(row.attempted_quizzes for row in rows),
+    }
+    return enrollments, stats
+
+def _dashboard_context(request, enrollments, stats, submissions, quiz_results):
+    return {
         'enrollments': enrollments,
         'submissions': submissions,
-        'quiz_results': quiz_results
+        'submissions_next_url': _next_page_url(request, submissions, 'dashboard_submissions_more'),
+        'quiz_results': quiz_results,
+        'quiz_results_next_url': _next_page_url(request, quiz_results, 'dashboard_quiz_results_more'),
+        'stats': stats,
     }
+
+@login_required
+@replica_reads
+def student_dashboard(request):
+    enrollments, stats = _dashboard_enrollments(request.user)
+    submissions = pagination.paginate(_submission_history(request.user), SUBMISSION_ORDERING, per_page=HISTORY_PER_PAGE)
+    quiz_results = pagination.paginate(_quiz_history(request.user), QUIZ_RESULT_ORDERING, per_page=HISTORY_PER_PAGE)
+    context = _dashboard_context(request, enrollments, stats, submissions, quiz_results)
     return render(request, 'student_dashboard.html', context)
 
+# 9.1 Dashboard "Load More" Fragments
+@login_required
+@replica_reads
+def dashboard_submissions_more(request):
+    page = pagination.paginate(_submission_history(request.user), SUBMISSION_ORDERING, request.GET.get('cursor'), HISTORY_PER_PAGE)
+    return _fragment(request, 'partials/dashboard_submission_rows.html', {'submissions': page},
+                     _next_page_url(request, page, 'dashboard_submissions_more'))
+
+@login_required
+@replica_reads
+def dashboard_quiz_results_more(request):
+    page = pagination.paginate(_quiz_history(request.user), QUIZ_RESULT_ORDERING, request.GET.get('cursor'), HISTORY_PER_PAGE)
+    return _fragment(request, 'partials/dashboard_quiz_rows.html', {'quiz_results': page},
+                     _next_page_url(request, page, 'dashboard_quiz_results_more'))
+
 # 10. Lesson Detail View
 @login_required
+@replica_reads
 def lesson_detail(request, course_id, lesson_id):
-    course = get_object_or_404(Course, id=course_id)
-    lesson = get_object_or_404(Lesson, id=lesson_id, course=course)
+    lesson = get_object_or_404(Lesson.objects.select_related('course'), id=lesson_id, course_id=course_id)
+    course = lesson.course
     
-    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    if not is_enrolled:
+    if not enrollments.is_enrolled(request, course.id):
         messages.error(request, "You must enroll in this course to view lessons.")
         return redirect('course_detail', course_id=course.id)
 
-    next_lesson = Lesson.objects.filter(course=course, order__gt=lesson.order).order_by('order').first()
-    previous_lesson = Lesson.objects.filter(course=course, order__lt=lesson.order).order_by('-order').first()
+    # Navigation comes from the cached outline instead of two range queries.
+    lessons = outline.get(course.id)
+    previous_lesson, next_lesson = lessons.neighbours(lesson.id)
 
     return render(request, 'lesson_detail.html', {
         'course': course,
         'lesson': lesson,
+        'lessons': lessons,
         'next_lesson': next_lesson,
         'previous_lesson': previous_lesson
     })
@@ -197,8 +304,7 @@ def assignment_detail(request, course_id, assignment_id):
     course = get_object_or_404(Course, id=course_id)
     assignment = get_object_or_404(Assignment, id=assignment_id, course=course)
     
-    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    if not is_enrolled:
+    if not enrollments.is_enrolled(request, course.id):
         messages.error(request, "You must enroll in this course to submit assignments.")
         return redirect('course_detail', course_id=course.id)
 
@@ -206,11 +312,22 @@ def assignment_detail(request, course_id, assignment_id):
 
     if request.method == 'POST':
         form = AssignmentSubmissionForm(request.POST, request.FILES, instance=submission)
+        for field, error in uploads.upload_errors(request).items():
+            form.add_error(field, error)
         if form.is_valid():
             sub = form.save(commit=False)
             sub.assignment = assignment
             sub.student = request.user
-            sub.save()
+            if sub.file and not sub.file._committed:
+                # Saving renames it to its content hash; keep what it was called.
+                sub.original_name = sub.file.name
+                # Store the upload now, not in save() below: that runs in a
+                # write transaction, which on SQLite blocks every other writer.
+                sub.file.save(sub.file.name, sub.file.file, save=False)
+            # The row, its progress and the course leaderboard shift commit
+            # together, so concurrent submissions can't rank each other twice.
+            with transaction.atomic():
+                sub.save()
             messages.success(request, "Assignment submitted successfully! 🎉")
             return redirect('assignment_detail', course_id=course.id, assignment_id=assignment.id)
     else:
@@ -224,6 +341,12 @@ def assignment_detail(request, course_id, assignment_id):
     })
 
 # 12. Mentor Grading View
+SUBMISSIONS_PER_PAGE = 50
+GRADING_ORDERING = ('submitted_at', 'id')
+
+def _grading_submissions(assignment):
+    return Submission.objects.filter(assignment=assignment).select_related('student')
+
 @login_required
 def assignment_submissions(request, course_id, assignment_id):
     course = get_object_or_404(Course, id=course_id)
@@ -233,25 +356,47 @@ def assignment_submissions(request, course_id, assignment_id):
         messages.error(request, "Access Denied. You are not the mentor of this course.")
         return redirect('course_detail', course_id=course.id)
 
-    submissions = Submission.objects.filter(assignment=assignment)
-
     if request.method == 'POST':
-        submission_id = request.POST.get('submission_id')
-        marks = request.POST.get('marks')
-        
-        if submission_id and marks:
-            sub = get_object_or_404(Submission, id=submission_id)
-            sub.marks = marks
-            sub.save()
-            messages.success(request, f"Marks updated for {sub.student.username}!")
-            return redirect('assignment_submissions', course_id=course.id, assignment_id=assignment.id)
+        # One row's Save button, "Save All Grades", or a marks CSV: all end
+        # up as {submission id: marks} written with a single bulk_update().
+        try:
+            if 'marks_file' in request.FILES:
+                marks = grading.marks_from_csv(request.FILES['marks_file'], assignment)
+            else:
+                marks = grading.marks_from_post(request.POST)
+            updated = grading.apply_marks(assignment, marks)
+        except ValidationError as e:
+            messages.error(request, e.message)
+        else:
+            messages.success(request, f"Marks updated for {updated} submission{pluralize(updated)}!")
+        return redirect('assignment_submissions', course_id=course.id, assignment_id=assignment.id)
+
+    submissions = pagination.paginate(_grading_submissions(assignment), GRADING_ORDERING, per_page=SUBMISSIONS_PER_PAGE)
 
     return render(request, 'assignment_submissions.html', {
         'course': course,
         'assignment': assignment,
-        'submissions': submissions
+        'submissions': submissions,
+        'submission_count': Submission.objects.filter(assignment=assignment).count(),
+        'next_page_url': _next_page_url(request, submissions, 'assignment_submissions_more',
+                                        course_id=course.id, assignment_id=assignment.id),
     })
 
+# 12.1 Mentor Grading "Load More" Fragment
+@login_required
+def assignment_submissions_more(request, course_id, assignment_id):
+    course = get_object_or_404(Course, id=course_id)
+    assignment = get_object_or_404(Assignment, id=assignment_id, course=course)
+    if request.user != course.mentor:
+        raise PermissionDenied
+
+    page = pagination.paginate(_grading_submissions(assignment), GRADING_ORDERING, request.GET.get('cursor'), SUBMISSIONS_PER_PAGE)
+    return _fragment(request, 'partials/submission_rows.html', {
+        'course': course,
+        'assignment': assignment,
+        'submissions': page,
+    }, _next_page_url(request, page, 'assignment_submissions_more', course_id=course.id, assignment_id=assignment.id))
+
 # 13. Take Quiz View
 @login_required
 def take_quiz(request, course_id, quiz_id):
@@ -268,23 +413,17 @@ def take_quiz(request, course_id, quiz_id):
         })
 
     if request.method == 'POST':
-        score = 0
-        total_questions = quiz.questions.count()
-        
-        for question in quiz.questions.all():
-            selected_choice_id = request.POST.get(f'question_{question.id}')
-            if selected_choice_id:
-                choice = Choice.objects.get(id=selected_choice_id)
-                if choice.is_correct:
-                    score += 1
+        # Graded in memory against the cached answer key: no per-question queries.
+        final_score = quizzes.grade(quiz.id, request.POST)
         
-        final_score = score
-        
-        result = QuizResult.objects.create(
-            quiz=quiz,
-            student=request.user,
-            score=final_score
-        )
+        # The result and its leaderboard placement (core/signals.py) commit
+        # together, so concurrent attempts can't shift each other twice.
+        with transaction.atomic():
+            result = QuizResult.objects.create(
+                quiz=quiz,
+                student=request.user,
+                score=final_score
+            )
         
         messages.success(request, f"Quiz submitted! You scored {final_score}")
         return render(request, 'quiz_result.html', {
@@ -296,58 +435,240 @@ def take_quiz(request, course_id, quiz_id):
 
     return render(request, 'take_quiz.html', {
         'course': course,
-        'quiz': quiz
+        'quiz': quiz,
+        'questions': quiz.questions.order_by('order', 'id').prefetch_related('choices'),
+        'quiz_version': quizzes.version(quiz.id),
     })
 
 # 14. Generate Certificate View 
 @login_required
 def generate_certificate(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
-    
-    
-    
-    
-    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    if not is_enrolled:
+    course = get_object_or_404(Course.objects.select_related('mentor'), id=course_id)
+    enrollment = None
+    if enrollments.is_enrolled(request, course.id):
+        enrollment = (
+            Enrollment.objects.filter(student=request.user, course=course)
+            .select_related('progress').first()
+        )
+    if enrollment is None:
         messages.error(request, "You are not enrolled in this course.")
         return redirect('course_detail', course_id=course.id)
 
-    
-    total_assignments = Assignment.objects.filter(course=course).count()
-    submitted_assignments = Submission.objects.filter(
-        student=request.user, 
-        assignment__course=course
-    ).count()
-
- 
-    if total_assignments > 0 and submitted_assignments < total_assignments:
+    course_progress = progress.of(enrollment)
+
+    if course_progress.submitted_assignments < course_progress.total_assignments:
         messages.error(request, "Please complete and submit all assignments before getting the certificate.")
         return redirect('course_detail', course_id=course.id)
 
-    
-    total_quizzes = Quiz.objects.filter(course=course).count()
-    attempted_quizzes = QuizResult.objects.filter(student=request.user, quiz__course=course).count()
-    if total_quizzes > 0 and attempted_quizzes < total_quizzes:
+    if course_progress.attempted_quizzes < course_progress.total_quizzes:
         messages.error(request, "Please attempt all quizzes before getting the certificate.")
         return redirect('course_detail', course_id=course.id)
-        
-  
-    
-    template = get_template('certificate_template.html')
-    html_content = template.render({
-        'student_name': f"{request.user.first_name} {request.user.last_name}",
-        'course_title': course.title,
-        'mentor_name': f"{course.mentor.first_name} {course.mentor.last_name}",
-        'completion_date': timezone.now().date(),
-    })
-    
-  
-    pdf_file = HTML(string=html_content).write_pdf() 
-    
-   
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="certificate_{course.title}_{request.user.username}.pdf"'
+
+    # PDFs are cached on disk, keyed by a hash of the certificate's content,
+    # so repeat downloads skip WeasyPrint entirely.
+    context = certificates.build_context(request.user, course, certificates.completion_date(enrollment))
+    key = certificates.cache_key(context)
+    etag = f'"{key}"'
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+
+    key, path = certificates.get_or_render(context)
+    response = FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=f"certificate_{course.title}_{request.user.username}.pdf",
+        content_type='application/pdf',
+    )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=60 * 60 * 24)
+    return response
+
+# 15. Cohort Certificates View (mentor downloads every earned certificate as one ZIP)
+@login_required
+def course_certificates(request, course_id):
+    course = get_object_or_404(Course.objects.select_related('mentor'), id=course_id)
+
+    if request.user != course.mentor:
+        messages.error(request, "Access Denied. You are not the mentor of this course.")
+        return redirect('course_detail', course_id=course.id)
+
+    jobs = certificates.cohort_jobs(course)
+    if not jobs:
+        messages.info(request, "No student has completed this course yet.")
+        return redirect('course_detail', course_id=course.id)
+
+    response = StreamingHttpResponse(
+        certificates.stream_zip(certificates.render_many(jobs)),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = content_disposition_header(True, f'certificates_{course.title}.zip')
+    return response
+
+# 16. Gradebook Export View (mentor downloads every student's marks as CSV)
+@login_required
+@replica_reads
+def course_gradebook(request, course_id):
+    course = get_object_or_404(Course.objects.select_related('mentor'), id=course_id)
+
+    if request.user != course.mentor:
+        messages.error(request, "Access Denied. You are not the mentor of this course.")
+        return redirect('course_detail', course_id=course.id)
+
+    response = StreamingHttpResponse(gradebook.stream_csv(course), content_type='text/csv')
+    response['Content-Disposition'] = content_disposition_header(True, f'gradebook_{course.title}.csv')
     return response
+
+# 17. Course Analytics View & API (marks/quiz score statistics, cached until a grade changes)
+@login_required
+@replica_reads
+def course_analytics(request, course_id):
+    course = get_object_or_404(Course.objects.select_related('mentor'), id=course_id)
+
+    if request.user != course.mentor:
+        messages.error(request, "Access Denied. You are not the mentor of this course.")
+        return redirect('course_detail', course_id=course.id)
+
+    stats = analytics.get(course.id)
+    return render(request, 'course_analytics.html', {
+        'course': course,
+        'stats': stats,
+        'marks_bars': analytics.histogram_bars(stats['marks']),
+        'quiz_bars': analytics.histogram_bars(stats['quiz_percent']),
+    })
+
+@login_required
+@replica_reads
+def course_analytics_api(request, course_id):
+    course = get_object_or_404(Course, id=course_id)
+    if request.user.id != course.mentor_id:
+        raise PermissionDenied
+    return JsonResponse(analytics.get(course.id))
+
+# 18. Leaderboards (JSON; ranks are kept up to date by core/leaderboards.py)
+LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 100
+
+def _leaderboard_course(request, course_id):
+    course = get_object_or_404(Course, id=course_id)
+    if request.user.id != course.mentor_id and not enrollments.is_enrolled(request, course.id):
+        raise PermissionDenied
+    return course
+
+def _leaderboard_limit(request):
+    try:
+        limit = int(request.GET.get('limit', LEADERBOARD_SIZE))
+    except ValueError:
+        raise BadRequest("Invalid limit.")
+    return max(1, min(limit, MAX_LEADERBOARD_SIZE))
+
+def _leaderboard_entry(rank, student, score):
+    return {'rank': rank, 'student': student.get_full_name() or student.username, 'score': score}
+
+@login_required
+@replica_reads
+def course_leaderboard(request, course_id):
+    course = _leaderboard_course(request, course_id)
+    rows = leaderboards.course_top(course.id, _leaderboard_limit(request))
+    return JsonResponse({
+        'entries': [_leaderboard_entry(row.rank, row.enrollment.student, row.total_marks) for row in rows],
+    })
+
+@login_required
+@replica_reads
+def course_leaderboard_me(request, course_id):
+    row = (
+        EnrollmentProgress.objects.filter(course_id=course_id, enrollment__student=request.user)
+        .values('rank', 'total_marks').first()
+    )
+    if row is None:
+        raise Http404("You are not enrolled in this course.")
+    return JsonResponse({'rank': row['rank'], 'score': row['total_marks']})
+
+@login_required
+@replica_reads
+def quiz_leaderboard(request, course_id, quiz_id):
+    course = _leaderboard_course(request, course_id)
+    quiz = get_object_or_404(Quiz, id=quiz_id, course=course)
+    rows = leaderboards.quiz_top(quiz.id, _leaderboard_limit(request))
+    return JsonResponse({
+        'entries': [_leaderboard_entry(row.rank, row.student, row.score) for row in rows],
+    })
+
+@login_required
+@replica_reads
+def quiz_leaderboard_me(request, course_id, quiz_id):
+    row = (
+        QuizResult.objects.filter(quiz_id=quiz_id, quiz__course_id=course_id, student=request.user)
+        .values('rank', 'score').first()
+    )
+    if row is None:
+        raise Http404("You have not taken this quiz.")
+    return JsonResponse({'rank': row['rank'], 'score': row['score']})
+
+# 19. Media View (uploads; core/media.py decides who may see each file)
+@require_safe
+def serve_media(request, name):
+    return media.serve(request, name)
+
+# 20. Async Read Views (course_detail, student_dashboard, lesson_detail)
+# The same pages for ASGI, picked in SkillBridge/urls.py when
+# settings.ASYNC_READ_VIEWS is on: each page's independent queries run at
+# the same time (core/concurrency.py) instead of one after another, and the
+# worker serves other requests while it waits.
+@page_cache.anonymous_page(_course_scope)
+@replica_reads
+async def course_detail_async(request, course_id):
+    course, is_enrolled, lessons, assignments, quizzes = await concurrency.gather(
+        lambda: get_object_or_404(Course.objects.select_related('mentor'), id=course_id),
+        lambda: enrollments.is_enrolled(request, course_id),
+        lambda: outline.get(course_id),
+        lambda: list(Assignment.objects.filter(course_id=course_id).order_by('due_date', 'id')),
+        lambda: list(Quiz.objects.filter(course_id=course_id)),
+    )
+    return await sync_to_async(render)(request, 'course_detail.html', {
+        'course': course,
+        'is_enrolled': is_enrolled,
+        'lessons': lessons,
+        'assignments': assignments,
+        'quizzes': quizzes
+    })
+
+@login_required
+@replica_reads
+async def student_dashboard_async(request):
+    user = await request.auser()
+    (enrollments, stats), submissions, quiz_results = await concurrency.gather(
+        lambda: _dashboard_enrollments(user),
+        lambda: pagination.paginate(_submission_history(user), SUBMISSION_ORDERING, per_page=HISTORY_PER_PAGE),
+        lambda: pagination.paginate(_quiz_history(user), QUIZ_RESULT_ORDERING, per_page=HISTORY_PER_PAGE),
+    )
+    context = _dashboard_context(request, enrollments, stats, submissions, quiz_results)
+    return await sync_to_async(render)(request, 'student_dashboard.html', context)
+
+@login_required
+@replica_reads
+async def lesson_detail_async(request, course_id, lesson_id):
+    lesson, is_enrolled, lessons = await concurrency.gather(
+        lambda: get_object_or_404(Lesson.objects.select_related('course'), id=lesson_id, course_id=course_id),
+        lambda: enrollments.is_enrolled(request, course_id),
+        lambda: outline.get(course_id),
+    )
+    if not is_enrolled:
+        messages.error(request, "You must enroll in this course to view lessons.")
+        return redirect('course_detail', course_id=course_id)
+
+    previous_lesson, next_lesson = lessons.neighbours(lesson.id)
+    return await sync_to_async(render)(request, 'lesson_detail.html', {
+        'course': lesson.course,
+        'lesson': lesson,
+        'lessons': lessons,
+        'next_lesson': next_lesson,
+        'previous_lesson': previous_lesson
+    })
+
 def about(request):
     return render(request, 'about.html')
 